@@ -0,0 +1 @@
+# In-memory structures over achievements
@@ -0,0 +1,108 @@
+import time
+from collections.abc import Iterable
+
+from backend.achievements.periods import normalize_period
+from backend.core.changes import Change, change_feed
+from backend.core.config import settings
+from backend.schemas.achievement import AchievementDTO
+
+
+class EligibilityIndex:
+    """Achievement catalog indexed by (division, position, period)
+
+    Periods are normalized, so "день" and "day" are the same period.
+    Writes made through the API update the index from the change feed;
+    achievements changed elsewhere show up on the next full reload.
+    """
+
+    def __init__(self, reload_interval: float):
+        self.reload_interval = reload_interval
+        self._achievements: dict[int, AchievementDTO] = {}
+        self._by_key: dict[tuple[str, str, str], set[int]] = {}
+        self._periods: dict[tuple[str, str], set[str]] = {}
+        self._loaded_at = float("-inf")
+
+    def __len__(self) -> int:
+        return len(self._achievements)
+
+    def is_stale(self) -> bool:
+        return time.monotonic() - self._loaded_at >= self.reload_interval
+
+    def load(self, achievements: Iterable[AchievementDTO]) -> None:
+        """Replace the whole index, e.g. with a fresh read from the database"""
+        self._achievements = {}
+        self._by_key = {}
+        self._periods = {}
+        for achievement in achievements:
+            self.upsert(achievement)
+        self._loaded_at = time.monotonic()
+
+    def upsert(self, achievement: AchievementDTO) -> None:
+        self.remove(achievement.id)
+        self._achievements[achievement.id] = achievement
+        period = normalize_period(achievement.period)
+        self._by_key.setdefault(
+            (achievement.division, achievement.position, period), set()
+        ).add(achievement.id)
+        self._periods.setdefault(
+            (achievement.division, achievement.position), set()
+        ).add(period)
+
+    def remove(self, achievement_id: int) -> None:
+        achievement = self._achievements.pop(achievement_id, None)
+        if achievement is None:
+            return
+        role = (achievement.division, achievement.position)
+        period = normalize_period(achievement.period)
+        key = (*role, period)
+        self._by_key[key].discard(achievement_id)
+        if not self._by_key[key]:
+            del self._by_key[key]
+            self._periods[role].discard(period)
+            if not self._periods[role]:
+                del self._periods[role]
+
+    def apply(self, change: Change) -> None:
+        """Change feed subscriber keeping the index in step with achievement writes"""
+        if change.resource != "achievement":
+            return
+        if change.op == "delete":
+            self.remove(change.key)
+        elif change.data is not None:
+            self.upsert(AchievementDTO.model_validate(change.data))
+
+    def get(self, achievement_id: int) -> AchievementDTO | None:
+        return self._achievements.get(achievement_id)
+
+    def eligible(
+        self, division: str | None, position: str | None, period: str | None = None
+    ) -> list[int]:
+        """Ids of achievements available to employees of division and position"""
+        if division is None or position is None:
+            return []
+        periods = (
+            [normalize_period(period)]
+            if period is not None
+            else self._periods.get((division, position), ())
+        )
+        return sorted(
+            achievement_id
+            for period_ in periods
+            for achievement_id in self._by_key.get((division, position, period_), ())
+        )
+
+    def for_division(self, division: str, period: str) -> list[AchievementDTO]:
+        """Achievements of division and period for every position"""
+        period = normalize_period(period)
+        return [
+            self._achievements[achievement_id]
+            for (division_, _, period_), ids in self._by_key.items()
+            if division_ == division and period_ == period
+            for achievement_id in sorted(ids)
+        ]
+
+
+eligibility_index = EligibilityIndex(
+    reload_interval=settings.ACHIEVEMENT_INDEX_RELOAD_SECONDS
+)
+change_feed.subscribe(eligibility_index.apply)
@@ -0,0 +1,251 @@
+import re
+from collections.abc import Callable, Iterable, Mapping, Sequence
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+
+from backend.schemas.achievement import AchievementDTO
+
+Mask = npt.NDArray[np.bool_]
+
+OPERATORS: dict[str, Callable[[npt.NDArray[np.float64], float], Mask]] = {
+    ">=": np.greater_equal,
+    "<=": np.less_equal,
+    ">": np.greater,
+    "<": np.less,
+    "==": np.equal,
+    "=": np.equal,
+    "!=": np.not_equal,
+}
+AND_WORDS = {"and", "и", "&&", "&", ",", ";"}
+OR_WORDS = {"or", "или", "||", "|"}
+
+_TOKEN = re.compile(
+    r"\s*(?:(?P<number>-?\d+(?:[.,]\d+)?)%?"
+    r"|(?P<op>>=|<=|==|!=|=|>|<)"
+    r"|(?P<paren>[()])"
+    r"|(?P<joint>&&|\|\||[&|,;])"
+    r"|(?P<word>[^\W\d][\w.]*))"
+)
+
+
+class KPIConditionError(ValueError):
+    pass
+
+
+@dataclass(frozen=True, slots=True)
+class Comparison:
+    metric: str
+    op: str
+    value: float
+
+
+@dataclass(frozen=True, slots=True)
+class Junction:
+    # "and" or "or"
+    kind: str
+    parts: tuple["Node", ...]
+
+
+Node = Comparison | Junction
+
+
+def tokenize(kpi: str) -> list[tuple[str, str]]:
+    tokens: list[tuple[str, str]] = []
+    pos = 0
+    kpi = kpi.strip()
+    while pos < len(kpi):
+        match = _TOKEN.match(kpi, pos)
+        kind = match.lastgroup if match is not None else None
+        if match is None or kind is None or match.end() == pos:
+            raise KPIConditionError(f"Не удалось разобрать KPI с позиции {pos}: {kpi}")
+        value = match.group(kind)
+        if kind == "word" and value.lower() in AND_WORDS | OR_WORDS:
+            kind = "joint"
+        tokens.append((kind, value.lower() if kind == "joint" else value))
+        pos = match.end()
+    return tokens
+
+
+def parse_kpi(kpi: str) -> Node:
+    """Parse conditions like "AHT <= 300 и (FLR >= 80 или CSI > 4.5)"
+
+    Comparisons are "<metric> <op> <number>", joined by and/и/&&/","
+    (binding tighter) and or/или/||, with optional parentheses.
+    """
+    tokens = tokenize(kpi)
+    if not tokens:
+        raise KPIConditionError("Пустое условие KPI")
+    pos = 0
+
+    def peek() -> tuple[str, str] | None:
+        return tokens[pos] if pos < len(tokens) else None
+
+    def take(kind: str) -> str:
+        nonlocal pos
+        token = peek()
+        if token is None or token[0] != kind:
+            raise KPIConditionError(f"Ожидался {kind} в условии KPI: {kpi}")
+        pos += 1
+        return token[1]
+
+    def junction(kind: str, words: set[str], operand: Callable[[], Node]) -> Node:
+        nonlocal pos
+        parts = [operand()]
+        while (
+            (token := peek()) is not None and token[0] == "joint" and token[1] in words
+        ):
+            pos += 1
+            parts.append(operand())
+        return parts[0] if len(parts) == 1 else Junction(kind, tuple(parts))
+
+    def atom() -> Node:
+        nonlocal pos
+        token = peek()
+        if token == ("paren", "("):
+            pos += 1
+            node = expression()
+            if take("paren") != ")":
+                raise KPIConditionError(f"Ожидалась ) в условии KPI: {kpi}")
+            return node
+        metric = take("word")
+        op = take("op")
+        value = float(take("number").replace(",", "."))
+        return Comparison(metric, op, value)
+
+    def expression() -> Node:
+        return junction("or", OR_WORDS, lambda: junction("and", AND_WORDS, atom))
+
+    node = expression()
+    if pos != len(tokens):
+        raise KPIConditionError(f"Лишние символы в условии KPI: {kpi}")
+    return node
+
+
+def metrics_of(node: Node) -> set[str]:
+    if isinstance(node, Comparison):
+        return {node.metric}
+    return set().union(*(metrics_of(part) for part in node.parts))
+
+
+class KPIFrame:
+    """KPI values of a group of employees, one column per metric
+
+    Missing values (None) never satisfy a comparison.
+    """
+
+    def __init__(self, size: int, columns: dict[str, Sequence[float | None]]):
+        self.size = size
+        self._columns: dict[str, npt.NDArray[np.float64]] = {}
+        for metric, values in columns.items():
+            if len(values) != size:
+                raise KPIConditionError(
+                    f"Метрика {metric}: {len(values)} значений вместо {size}"
+                )
+            self._columns[metric.lower()] = np.array(
+                [np.nan if v is None else v for v in values], dtype=np.float64
+            )
+
+    def __contains__(self, metric: str) -> bool:
+        return metric.lower() in self._columns
+
+    def mask(self, node: Node) -> Mask:
+        """Boolean mask of employees satisfying node"""
+        if isinstance(node, Comparison):
+            column = self._columns[node.metric.lower()]
+            # NaN compares unequal to everything, so != needs the explicit check
+            return OPERATORS[node.op](column, node.value) & ~np.isnan(column)
+
+        masks = [self.mask(part) for part in node.parts]
+        reduce = np.logical_and if node.kind == "and" else np.logical_or
+        result: Mask = reduce.reduce(masks)
+        return result
+
+    def where(self, values: Sequence[str | None], value: str | None) -> Mask:
+        """Boolean mask of rows where values equals value"""
+        result: Mask = np.asarray(values, dtype=object) == value
+        return result
+
+    @staticmethod
+    def indices(mask: Mask, extra: Mask | None = None) -> list[int]:
+        hits: list[int] = np.flatnonzero(
+            mask if extra is None else mask & extra
+        ).tolist()
+        return hits
+
+
+def division_positions(
+    employees: Mapping[int, Any], user_ids: Sequence[int], division: str
+) -> list[str | None]:
+    """Position per row, None for unknown employees and those of other divisions"""
+    return [
+        emp.position if emp is not None and emp.division == division else None
+        for emp in map(employees.get, user_ids)
+    ]
+
+
+class KPIEngine:
+    """Evaluates achievement KPI conditions over whole columns at once
+
+    Each distinct KPI string is parsed once and kept. An evaluation pass
+    computes one mask per achievement over all employees instead of checking
+    employees one by one.
+    """
+
+    def __init__(self) -> None:
+        self._parsed: dict[str, Node | KPIConditionError] = {}
+
+    def condition(self, kpi: str) -> Node:
+        parsed = self._parsed.get(kpi)
+        if parsed is None:
+            try:
+                parsed = parse_kpi(kpi)
+            except KPIConditionError as e:
+                parsed = e
+            self._parsed[kpi] = parsed
+        if isinstance(parsed, KPIConditionError):
+            raise parsed
+        return parsed
+
+    def evaluate(
+        self,
+        achievements: Iterable[AchievementDTO],
+        frame: KPIFrame,
+        positions: Sequence[str | None] | None = None,
+    ) -> tuple[list[tuple[int, AchievementDTO]], dict[int, str]]:
+        """Rows earning each achievement and reasons of skipped achievements
+
+        With positions, an achievement is only awarded to rows of its position.
+        """
+        awards: list[tuple[int, AchievementDTO]] = []
+        skipped: dict[int, str] = {}
+        position_masks: dict[str | None, Mask] = {}
+        for achievement in achievements:
+            try:
+                node = self.condition(achievement.kpi)
+            except KPIConditionError as e:
+                skipped[achievement.id] = str(e)
+                continue
+
+            missing = sorted(m for m in metrics_of(node) if m not in frame)
+            if missing:
+                skipped[achievement.id] = f"Нет данных метрик: {', '.join(missing)}"
+                continue
+
+            extra: Mask | None = None
+            if positions is not None:
+                if achievement.position not in position_masks:
+                    position_masks[achievement.position] = frame.where(
+                        positions, achievement.position
+                    )
+                extra = position_masks[achievement.position]
+
+            awards.extend(
+                (row, achievement) for row in frame.indices(frame.mask(node), extra)
+            )
+        return awards, skipped
+
+
+kpi_engine = KPIEngine()
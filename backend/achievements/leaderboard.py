@@ -0,0 +1,204 @@
+import random
+import time
+from collections.abc import Iterable
+from datetime import date
+
+from backend.core.config import settings
+
+# Leaderboard period covering every award
+ALL_TIME = "all"
+
+
+def award_month(period_key: str) -> str:
+    """Month "YYYY-MM" an award period key belongs to, weeks by their Monday"""
+    if "-W" in period_key:
+        year, week = period_key.split("-W")
+        return date.fromisocalendar(int(year), int(week), 1).strftime("%Y-%m")
+    return period_key[:7]
+
+
+# Ranking entries, ordered by points descending then user_id
+Key = tuple[int, int]
+
+
+class _Node:
+    __slots__ = ("key", "priority", "size", "left", "right")
+
+    def __init__(self, key: Key):
+        self.key = key
+        self.priority = random.random()
+        self.size = 1
+        self.left: _Node | None = None
+        self.right: _Node | None = None
+
+
+def _size(node: _Node | None) -> int:
+    return node.size if node is not None else 0
+
+
+def _split(node: _Node | None, key: Key) -> tuple[_Node | None, _Node | None]:
+    """Nodes with keys below key and the rest"""
+    if node is None:
+        return None, None
+    if node.key < key:
+        node.right, rest = _split(node.right, key)
+        node.size = 1 + _size(node.left) + _size(node.right)
+        return node, rest
+    below, node.left = _split(node.left, key)
+    node.size = 1 + _size(node.left) + _size(node.right)
+    return below, node
+
+
+def _merge(left: _Node | None, right: _Node | None) -> _Node | None:
+    """Join two treaps, every key of left below every key of right"""
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.priority > right.priority:
+        left.right = _merge(left.right, right)
+        left.size = 1 + _size(left.left) + _size(left.right)
+        return left
+    right.left = _merge(left, right.left)
+    right.size = 1 + _size(right.left) + _size(right.right)
+    return right
+
+
+class Ranking:
+    """Scores of users in a treap keyed by (-points, user_id)
+
+    Nodes carry subtree sizes, so a score change, a rank lookup and reaching
+    the start of the top are O(log n) expected; top-N then reads N entries.
+    """
+
+    def __init__(self) -> None:
+        self._points: dict[int, int] = {}
+        self._root: _Node | None = None
+
+    @classmethod
+    def from_points(cls, points: dict[int, int]) -> "Ranking":
+        """Ranking of user_id -> points, built from one sort instead of n inserts"""
+        ranking = cls()
+        ranking._points = dict(points)
+        # Cartesian tree over the sorted keys: the right spine is on the stack
+        stack: list[_Node] = []
+        for key in sorted((-total, user_id) for user_id, total in points.items()):
+            node = _Node(key)
+            child = None
+            while stack and stack[-1].priority < node.priority:
+                child = stack.pop()
+            node.left = child
+            if stack:
+                stack[-1].right = node
+            stack.append(node)
+        ranking._root = stack[0] if stack else None
+
+        # Subtree sizes, children before parents
+        order: list[_Node] = []
+        pending = [ranking._root] if ranking._root is not None else []
+        while pending:
+            node = pending.pop()
+            order.append(node)
+            pending.extend(c for c in (node.left, node.right) if c is not None)
+        for node in reversed(order):
+            node.size = 1 + _size(node.left) + _size(node.right)
+        return ranking
+
+    def __len__(self) -> int:
+        return _size(self._root)
+
+    def add(self, user_id: int, points: int) -> None:
+        old = self._points.get(user_id)
+        if old is not None:
+            self._remove((-old, user_id))
+        new = (old or 0) + points
+        self._points[user_id] = new
+        below, rest = _split(self._root, (-new, user_id))
+        self._root = _merge(_merge(below, _Node((-new, user_id))), rest)
+
+    def top(self, limit: int) -> list[tuple[int, int, int]]:
+        """(rank, user_id, points) of the first limit users, ties share a rank"""
+        result: list[tuple[int, int, int]] = []
+        stack: list[_Node] = []
+        node = self._root
+        while (stack or node is not None) and len(result) < limit:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            neg_points, user_id = node.key
+            if result and result[-1][2] == -neg_points:
+                rank = result[-1][0]
+            else:
+                rank = len(result) + 1
+            result.append((rank, user_id, -neg_points))
+            node = node.right
+        return result
+
+    def rank(self, user_id: int) -> tuple[int, int] | None:
+        """(rank, points) of user, None when the user has no points"""
+        points = self._points.get(user_id)
+        if points is None:
+            return None
+        return self._rank_of(points), points
+
+    def _rank_of(self, points: int) -> int:
+        # Users with more points, (-points,) sorts before every (-points, user_id)
+        ahead = 0
+        node = self._root
+        while node is not None:
+            if node.key < (-points,):
+                ahead += _size(node.left) + 1
+                node = node.right
+            else:
+                node = node.left
+        return ahead + 1
+
+    def _remove(self, key: Key) -> None:
+        below, rest = _split(self._root, key)
+        _, above = _split(rest, (key[0], key[1] + 1))
+        self._root = _merge(below, above)
+
+
+class Leaderboard:
+    """Rankings of award points per (division, month) and per division overall
+
+    Awards written by the scheduler in this process are added as they are
+    inserted. A periodic rebuild from the awards table picks up awards
+    written by other workers and corrects any drift.
+    """
+
+    def __init__(self, rebuild_interval: float):
+        self.rebuild_interval = rebuild_interval
+        self._rankings: dict[tuple[str, str], Ranking] = {}
+        self._built_at = float("-inf")
+
+    def is_stale(self) -> bool:
+        return time.monotonic() - self._built_at >= self.rebuild_interval
+
+    def rebuild(self, totals: Iterable[tuple[str, int, str, int]]) -> None:
+        """Replace all rankings with (division, user_id, period_key, points) totals"""
+        points: dict[tuple[str, str], dict[int, int]] = {}
+        for division, user_id, period_key, total in totals:
+            for period in (award_month(period_key), ALL_TIME):
+                scores = points.setdefault((division, period), {})
+                scores[user_id] = scores.get(user_id, 0) + total
+        self._rankings = {
+            key: Ranking.from_points(scores) for key, scores in points.items()
+        }
+        self._built_at = time.monotonic()
+
+    def add(self, awards: Iterable[tuple[str, int, str, int]]) -> None:
+        """Add (division, user_id, period_key, points) to the matching rankings"""
+        for division, user_id, period_key, points in awards:
+            for period in (award_month(period_key), ALL_TIME):
+                ranking = self._rankings.get((division, period))
+                if ranking is None:
+                    ranking = self._rankings[(division, period)] = Ranking()
+                ranking.add(user_id, points)
+
+    def get(self, division: str, period: str) -> Ranking:
+        return self._rankings.get((division, period)) or Ranking()
+
+
+leaderboard = Leaderboard(rebuild_interval=settings.LEADERBOARD_REBUILD_SECONDS)
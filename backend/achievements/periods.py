@@ -0,0 +1,14 @@
+# Values of Achievement.period per canonical period, stored in either language.
+# "manual" and other values have no synonyms and are never scheduled
+PERIODS: dict[str, set[str]] = {
+    "day": {"day", "день"},
+    "week": {"week", "неделя"},
+    "month": {"month", "месяц"},
+}
+
+_CANONICAL = {value: period for period, values in PERIODS.items() for value in values}
+
+
+def normalize_period(period: str) -> str:
+    """Canonical name of a period value, e.g. "день" -> "day", others as is"""
+    return _CANONICAL.get(period.strip().lower(), period)
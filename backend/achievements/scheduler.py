@@ -0,0 +1,237 @@
+import asyncio
+import importlib
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from datetime import time as dt_time
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+from stp_database.models.STP import Achievement
+
+from backend.achievements.kpi import KPIFrame, division_positions, kpi_engine
+from backend.achievements.leaderboard import leaderboard
+from backend.achievements.periods import PERIODS
+from backend.api.deps import session_pool
+from backend.core.config import settings
+from backend.core.db import engine
+from backend.queries.awards import insert_awards
+from backend.queries.employees import get_employees_by_ids
+from backend.queries.locks import named_lock
+from backend.schemas.achievement import AchievementDTO
+
+logger = logging.getLogger(__name__)
+
+# (session, division, start, end) -> user ids and metric columns aligned with them
+KPISource = Callable[
+    [AsyncSession, str, date, date],
+    Awaitable[tuple[list[int], dict[str, list[float | None]]]],
+]
+
+
+def load_kpi_source(path: str) -> KPISource:
+    """Import the KPI source named by package.module:function"""
+    module_name, _, attribute = path.partition(":")
+    if not module_name or not attribute:
+        raise ValueError(f"KPI source must be package.module:function, got {path!r}")
+    source: KPISource = getattr(importlib.import_module(module_name), attribute)
+    return source
+
+
+def period_start(period: str, day: date) -> date:
+    if period == "day":
+        return day
+    if period == "week":
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def previous_period(period: str, now: datetime) -> tuple[date, date, str]:
+    """Bounds [start, end) and key of the last complete period before now"""
+    end = period_start(period, now.date())
+    start = period_start(period, end - timedelta(days=1))
+    if period == "day":
+        key = start.isoformat()
+    elif period == "week":
+        year, week, _ = start.isocalendar()
+        key = f"{year}-W{week:02d}"
+    else:
+        key = start.strftime("%Y-%m")
+    return start, end, key
+
+
+def next_run(period: str, now: datetime, offset: timedelta) -> datetime:
+    """Next time after now that is offset past the start of a period"""
+    start = period_start(period, now.date())
+    run = datetime.combine(start, dt_time()) + offset
+    if run > now:
+        return run
+    # From a period start this many days always lands in the next period
+    step = {"day": 1, "week": 7, "month": 32}[period]
+    following = period_start(period, start + timedelta(days=step))
+    return datetime.combine(following, dt_time()) + offset
+
+
+@dataclass
+class JobStats:
+    runs: int = 0
+    failures: int = 0
+    # Runs skipped because another worker held the lock
+    skipped: int = 0
+    last_period_key: str | None = None
+    last_started_at: datetime | None = None
+    last_duration_seconds: float | None = None
+    last_awards: int = 0
+    last_inserted: int = 0
+    total_inserted: int = 0
+    last_error: str | None = None
+
+
+class AwardScheduler:
+    """Runs day, week and month award jobs shortly after each period ends
+
+    A job evaluates the KPI conditions of the period's achievements against
+    data from kpi_source for the period that just ended and inserts awards
+    keyed by (user_id, achievement_id, period_key), so reruns and catch-up
+    runs after a restart never award twice. A MySQL named lock per job and
+    period keeps concurrent workers from running the same job.
+    """
+
+    def __init__(
+        self,
+        sessions: async_sessionmaker[AsyncSession],
+        lock_engine: AsyncEngine,
+        offset: timedelta,
+        batch_size: int,
+        kpi_source: KPISource | None = None,
+    ):
+        self.sessions = sessions
+        self.lock_engine = lock_engine
+        self.offset = offset
+        self.batch_size = batch_size
+        self.kpi_source = kpi_source
+        self.stats = {period: JobStats() for period in PERIODS}
+        self._task: asyncio.Task | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self, catch_up: bool = True) -> None:
+        if self.kpi_source is None:
+            logger.warning("Award scheduler not started: KPI source is not configured")
+            return
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop(catch_up))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self, catch_up: bool) -> None:
+        if catch_up:
+            for period in PERIODS:
+                await self._run_safely(period)
+        while True:
+            now = datetime.now()
+            due = {period: next_run(period, now, self.offset) for period in PERIODS}
+            period = min(due, key=due.__getitem__)
+            await asyncio.sleep((due[period] - now).total_seconds())
+            await self._run_safely(period)
+
+    async def _run_safely(self, period: str) -> None:
+        try:
+            await self.run_job(period)
+        except Exception:
+            logger.exception("Award job %s failed", period)
+
+    async def run_job(self, period: str, now: datetime | None = None) -> JobStats:
+        """Award achievements of period for the last complete period before now"""
+        stats = self.stats[period]
+        if self.kpi_source is None:
+            stats.last_error = "KPI source is not configured"
+            return stats
+
+        start, end, period_key = previous_period(period, now or datetime.now())
+        async with named_lock(
+            self.lock_engine, f"stp:awards:{period}:{period_key}"
+        ) as acquired:
+            if not acquired:
+                stats.skipped += 1
+                return stats
+
+            stats.runs += 1
+            stats.last_period_key = period_key
+            stats.last_started_at = datetime.now()
+            started = time.monotonic()
+            try:
+                awards, divisions = await self._evaluate(period, start, end)
+                async with self.sessions() as session:
+                    inserted = await insert_awards(
+                        session, awards, period_key, self.batch_size
+                    )
+                leaderboard.add(
+                    (divisions[achievement_id], user_id, period_key, reward)
+                    for user_id, achievement_id, reward in inserted
+                )
+            except Exception as e:
+                stats.failures += 1
+                stats.last_error = str(e)
+                raise
+            finally:
+                stats.last_duration_seconds = time.monotonic() - started
+
+        stats.last_awards = len(awards)
+        stats.last_inserted = len(inserted)
+        stats.total_inserted += len(inserted)
+        stats.last_error = None
+        return stats
+
+    async def _evaluate(
+        self, period: str, start: date, end: date
+    ) -> tuple[list[tuple[int, int, int]], dict[int, str]]:
+        """(user_id, achievement_id, reward) awards and divisions of achievements"""
+        awards: list[tuple[int, int, int]] = []
+        divisions: dict[int, str] = {}
+        async with self.sessions() as session:
+            rows = await session.scalars(
+                select(Achievement).where(Achievement.period.in_(PERIODS[period]))
+            )
+            by_division: dict[str, list[AchievementDTO]] = {}
+            for row in rows:
+                achievement = AchievementDTO.model_validate(row)
+                by_division.setdefault(achievement.division, []).append(achievement)
+                divisions[achievement.id] = achievement.division
+
+            for division, achievements in by_division.items():
+                user_ids, metrics = await self.kpi_source(session, division, start, end)
+                employees = await get_employees_by_ids(
+                    session, user_ids, self.batch_size
+                )
+                earned, skipped = kpi_engine.evaluate(
+                    achievements,
+                    KPIFrame(len(user_ids), metrics),
+                    division_positions(employees, user_ids, division),
+                )
+                for achievement_id, reason in skipped.items():
+                    logger.warning("Achievement %s skipped: %s", achievement_id, reason)
+                awards.extend(
+                    (user_ids[row], achievement.id, achievement.reward)
+                    for row, achievement in earned
+                )
+        return awards, divisions
+
+
+award_scheduler = AwardScheduler(
+    sessions=session_pool,
+    lock_engine=engine,
+    offset=timedelta(minutes=settings.AWARDS_RUN_OFFSET_MINUTES),
+    batch_size=settings.BULK_BATCH_SIZE,
+)
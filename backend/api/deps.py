@@ -2,16 +2,27 @@ from typing import Annotated
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 from stp_database import create_session_pool
-from stp_database.models.STP import Employee
 from stp_database.repo.STP import MainRequestsRepo
 
-from backend.auth.utils import decode_jwt
+from backend.auth.refresh import ACCESS_TOKEN_TYPE
+from backend.auth.utils import decode_jwt_cached
+from backend.core.cache import TTLCache
+from backend.core.config import settings
 from backend.core.db import engine
+from backend.schemas.auth import UserInfo
+from backend.schemas.employee import EmployeeDTO
 
 session_pool = create_session_pool(engine)
 
+# Snapshots of authenticated employees by Telegram id, invalidated by employee writes
+identity_cache: TTLCache[int, EmployeeDTO] = TTLCache(
+    maxsize=settings.auth_jwt.identity_cache_size,
+    ttl=settings.auth_jwt.identity_cache_ttl_seconds,
+)
+
 
 async def get_session():
     async with session_pool() as session:
@@ -34,15 +45,19 @@ async def get_current_user(
 ):
     """Validate JWT token and return current user"""
     try:
-        payload = await decode_jwt(token.credentials)
+        payload = await decode_jwt_cached(token.credentials)
         user_id: int | None = payload.get("user_id", None)
 
-        if not user_id:
+        if not user_id or payload.get("type", ACCESS_TOKEN_TYPE) != ACCESS_TOKEN_TYPE:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid authentication credentials",
             )
 
+        user = identity_cache.get(user_id)
+        if user is not None:
+            return user
+
         users = await repo.employee.get_users(user_id=user_id)
         if not users:
             raise HTTPException(
@@ -51,6 +66,8 @@ async def get_current_user(
             )
 
         user = users[0] if isinstance(users, list) else users
+        user = EmployeeDTO.model_validate(user)
+        identity_cache.set(user_id, user)
         return user
 
     except HTTPException:
@@ -62,4 +79,37 @@ async def get_current_user(
         )
 
 
-CurrentUserDep = Annotated[Employee, Depends(get_current_user)]
+CurrentUserDep = Annotated[EmployeeDTO, Depends(get_current_user)]
+
+
+async def get_token_user(
+    token: Annotated[HTTPAuthorizationCredentials, Depends(security)],
+):
+    """Validate JWT token and return user from its claims without DB access"""
+    try:
+        payload = await decode_jwt_cached(token.credentials)
+        user = UserInfo.model_validate(payload)
+    except ValidationError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token claims",
+        )
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication credentials",
+        )
+
+    if not user.user_id or payload.get("type", ACCESS_TOKEN_TYPE) != ACCESS_TOKEN_TYPE:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication credentials",
+        )
+
+    return user
+
+
+TokenUserDep = Annotated[UserInfo, Depends(get_token_user)]
+
+# For routes that only need identity: served from claims in stateless mode
+IdentityDep = TokenUserDep if settings.auth_jwt.stateless else CurrentUserDep
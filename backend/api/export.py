@@ -0,0 +1,65 @@
+import csv
+import io
+from collections.abc import AsyncIterator
+from typing import Literal
+
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy import Select
+
+from backend.api.deps import session_pool
+from backend.core.config import settings
+
+ExportFormat = Literal["ndjson", "csv"]
+
+MEDIA_TYPES: dict[str, str] = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+async def _iter_rows(
+    stmt: Select, dto: type[BaseModel], export_format: ExportFormat
+) -> AsyncIterator[bytes]:
+    # The session is owned by the generator, so it stays open while the body streams
+    async with session_pool() as session:
+        result = await session.stream_scalars(
+            stmt.execution_options(yield_per=settings.EXPORT_BATCH_SIZE)
+        )
+
+        fields = list(dto.model_fields)
+        if export_format == "csv":
+            # BOM keeps Cyrillic readable when the file is opened in Excel
+            buffer = io.StringIO()
+            csv.writer(buffer).writerow(fields)
+            yield ("\ufeff" + buffer.getvalue()).encode()
+
+        async for partition in result.partitions():
+            buffer = io.StringIO()
+            if export_format == "csv":
+                writer = csv.DictWriter(buffer, fieldnames=fields)
+                for row in partition:
+                    writer.writerow(dto.model_validate(row).model_dump(mode="json"))
+            else:
+                for row in partition:
+                    buffer.write(dto.model_validate(row).model_dump_json())
+                    buffer.write("\n")
+            yield buffer.getvalue().encode()
+
+
+def export_response(
+    stmt: Select, dto: type[BaseModel], export_format: ExportFormat, filename: str
+) -> StreamingResponse:
+    """Stream query rows shaped by dto as NDJSON or CSV
+
+    Rows are read from a server-side cursor one batch at a time and every
+    batch is awaited by the ASGI server before the next one is fetched,
+    so memory use does not depend on the table size
+    """
+    return StreamingResponse(
+        _iter_rows(stmt, dto, export_format),
+        media_type=MEDIA_TYPES[export_format],
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}.{export_format}"'
+        },
+    )
@@ -1,8 +1,18 @@
 from fastapi import APIRouter
 
-from backend.api.routes import achievements, auth, employees
+from backend.api.routes import (
+    achievements,
+    auth,
+    employees,
+    events,
+    exchanges,
+    metrics,
+)
 
 api_router = APIRouter()
 api_router.include_router(auth.router)
 api_router.include_router(employees.router)
 api_router.include_router(achievements.router)
+api_router.include_router(exchanges.router)
+api_router.include_router(events.router)
+api_router.include_router(metrics.router)
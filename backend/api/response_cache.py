@@ -0,0 +1,91 @@
+import hashlib
+from collections.abc import Hashable
+
+from fastapi import Request, Response, status
+from pydantic import BaseModel
+from sqlalchemy import Table
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.core.cache import TTLCache
+from backend.core.config import settings
+from backend.queries.fingerprint import table_fingerprint
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Whether an If-None-Match header value matches etag, weak or not"""
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+class ResponseCache:
+    """Serialized JSON bodies of list routes keyed by path, query and table state
+
+    Each lookup reads the table fingerprint with one aggregate query. It is
+    part of the key, so any write, through this worker or not, makes earlier
+    entries unreachable and they age out of the LRU.
+
+    ETags hash the same fingerprint with the normalized query, so they agree
+    across workers and a client revalidating an unchanged list gets a 304
+    before any row is read. Responses carry Cache-Control max-age of the TTL,
+    how long clients may reuse a body without revalidating.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, max_body_bytes: int):
+        self.ttl = ttl
+        self.max_body_bytes = max_body_bytes
+        self._cache: TTLCache[Hashable, bytes] = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    @staticmethod
+    def etag(fingerprint: str, query: tuple[tuple[str, str], ...]) -> str:
+        digest = hashlib.blake2b(repr(query).encode(), digest_size=8).hexdigest()
+        return f'"{fingerprint}.{digest}"'
+
+    async def lookup(
+        self, request: Request, session: AsyncSession, table: Table
+    ) -> tuple[Hashable, str, Response | None]:
+        """Cache key and ETag of request, with a 304 or the cached response if any"""
+        fingerprint = await table_fingerprint(session, table)
+        query = tuple(sorted(request.query_params.multi_items()))
+        etag = self.etag(fingerprint, query)
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return (
+                None,
+                etag,
+                Response(
+                    status_code=status.HTTP_304_NOT_MODIFIED,
+                    headers=self._headers(etag),
+                ),
+            )
+
+        key = (request.url.path, fingerprint, query)
+        body = self._cache.get(key)
+        if body is None:
+            return key, etag, None
+        return key, etag, self._response(body, etag)
+
+    def respond(self, key: Hashable, etag: str, model: BaseModel) -> Response:
+        """Serialize model once, keep the body and return it"""
+        body = model.model_dump_json().encode()
+        if len(body) <= self.max_body_bytes:
+            self._cache.set(key, body)
+        return self._response(body, etag)
+
+    def _headers(self, etag: str) -> dict[str, str]:
+        return {"ETag": etag, "Cache-Control": f"private, max-age={int(self.ttl)}"}
+
+    def _response(self, body: bytes, etag: str) -> Response:
+        return Response(
+            content=body, media_type="application/json", headers=self._headers(etag)
+        )
+
+    def stats(self) -> dict[str, int | float]:
+        return self._cache.stats()
+
+
+response_cache = ResponseCache(
+    maxsize=settings.RESPONSE_CACHE_SIZE,
+    ttl=settings.RESPONSE_CACHE_TTL_SECONDS,
+    max_body_bytes=settings.RESPONSE_CACHE_MAX_BODY_BYTES,
+)
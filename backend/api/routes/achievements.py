@@ -2,31 +2,87 @@ from datetime import datetime
 
 from fastapi import APIRouter, HTTPException, Query, Request, status
 from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from stp_database.models.STP import Achievement
 
+from backend.achievements.eligibility import EligibilityIndex, eligibility_index
+from backend.achievements.kpi import (
+    KPIConditionError,
+    KPIFrame,
+    division_positions,
+    kpi_engine,
+)
+from backend.achievements.leaderboard import ALL_TIME, Leaderboard, leaderboard
 from backend.api.deps import CurrentUserDep, RepoDep
-from backend.schemas.achievement import AchievementDTO, AchievementsList
-from backend.schemas.employee import PatchEmployeeDTO
+from backend.api.export import ExportFormat, export_response
+from backend.api.response_cache import response_cache
+from backend.core.changes import change_feed
+from backend.core.config import settings
+from backend.queries.awards import get_award_totals
+from backend.queries.employees import get_employees_by_ids
+from backend.queries.fingerprint import table_fingerprint
+from backend.schemas.achievement import (
+    AchievementDTO,
+    AchievementEligibility,
+    AchievementEligibilityBatch,
+    AchievementEligibilityBatchRequest,
+    AchievementsList,
+    AchievementsSync,
+    KPIAward,
+    KPIEvaluation,
+    KPIEvaluationRequest,
+    LeaderboardEntry,
+    PatchAchievementDTO,
+    PointsLeaderboard,
+)
+from backend.schemas.employee import EmployeeSummary
 
 router = APIRouter(prefix="/achievements", tags=["Достижения"])
 
 
+async def get_eligibility_index(session: AsyncSession) -> EligibilityIndex:
+    """Return the eligibility index, reloading it from the database when stale"""
+    if eligibility_index.is_stale():
+        achievements = await session.scalars(select(Achievement))
+        eligibility_index.load(
+            AchievementDTO.model_validate(ach) for ach in achievements
+        )
+    return eligibility_index
+
+
+async def get_leaderboard(session: AsyncSession) -> Leaderboard:
+    """Return the leaderboard, rebuilding it from the awards table when stale"""
+    if leaderboard.is_stale():
+        leaderboard.rebuild(await get_award_totals(session))
+    return leaderboard
+
+
 @router.get(
     "/",
     name="Получить достижения",
     description="Получает список достижений с фильтрами",
     status_code=status.HTTP_200_OK,
     responses={
+        304: {"description": "Not modified"},
         404: {"description": "Not found"},
         400: {"description": "Bad request"},
     },
     response_model=AchievementsList,
 )
 async def get_achievements(
+    request: Request,
     repo: RepoDep,
     _current_user: CurrentUserDep,
     division: str | None = Query(None, description="Направление сотрудника"),
     achievement_id: int | None = Query(None, description="Идентификатор достижения"),
 ):
+    cache_key, etag, cached = await response_cache.lookup(
+        request, repo.session, Achievement.__table__
+    )
+    if cached is not None:
+        return cached
+
     try:
         achievements = await repo.achievement.get_achievements(
             achievement_id=achievement_id, division=division
@@ -42,13 +98,305 @@ async def get_achievements(
 
         achievements = [AchievementDTO.model_validate(ach) for ach in achievements]
 
-        return AchievementsList(achievements=achievements)
+        return response_cache.respond(
+            cache_key, etag, AchievementsList(achievements=achievements)
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Server error: {e}",
+        )
+
+
+@router.get(
+    "/sync",
+    name="Синхронизировать достижения",
+    description="Возвращает достижения, измененные или удаленные после выдачи токена синхронизации",
+    status_code=status.HTTP_200_OK,
+    response_model=AchievementsSync,
+)
+async def sync_achievements(
+    repo: RepoDep,
+    _current_user: CurrentUserDep,
+    sync_token: str | None = Query(
+        None, alias="token", description="Токен из предыдущего ответа"
+    ),
+):
+    try:
+        fingerprint = await table_fingerprint(repo.session, Achievement.__table__)
+        changes, next_token = change_feed.delta("achievement", sync_token, fingerprint)
+        if changes is None:
+            achievements = await repo.achievement.get_achievements()
+            if not isinstance(achievements, (list, tuple)):
+                achievements = [achievements] if achievements else []
+
+            return AchievementsSync(
+                reset=True,
+                achievements=[
+                    AchievementDTO.model_validate(ach) for ach in achievements
+                ],
+                deleted=[],
+                sync_token=next_token,
+            )
+
+        upserted = [key for key, op in changes.items() if op == "upsert"]
+        rows = (
+            await repo.session.scalars(
+                select(Achievement).where(Achievement.id.in_(upserted))
+            )
+            if upserted
+            else []
+        )
+        achievements = {ach.id: AchievementDTO.model_validate(ach) for ach in rows}
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Server error: {e}",
         )
 
+    return AchievementsSync(
+        reset=False,
+        achievements=list(achievements.values()),
+        deleted=[key for key in changes if key not in achievements],
+        sync_token=next_token,
+    )
+
+
+@router.get(
+    "/eligible",
+    name="Получить доступные достижения",
+    description="Возвращает достижения, подходящие сотруднику по направлению и должности",
+    status_code=status.HTTP_200_OK,
+    responses={
+        404: {"description": "Not found"},
+    },
+    response_model=AchievementEligibility,
+)
+async def get_eligible_achievements(
+    repo: RepoDep,
+    _current_user: CurrentUserDep,
+    user_id: int = Query(..., description="Идентификатор Telegram"),
+    period: str | None = Query(None, description="Частота получения достижения"),
+):
+    try:
+        employees = await get_employees_by_ids(repo.session, [user_id], batch_size=1)
+        index = await get_eligibility_index(repo.session)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Server error: {e}",
+        )
+
+    employee = employees.get(user_id)
+    if employee is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+
+    return AchievementEligibility(
+        employee=EmployeeSummary.model_validate(employee),
+        achievements=[
+            index.get(achievement_id)
+            for achievement_id in index.eligible(
+                employee.division, employee.position, period
+            )
+        ],
+    )
+
+
+@router.post(
+    "/eligible/batch",
+    name="Получить доступные достижения по списку",
+    description="Возвращает доступные достижения для списка сотрудников одним запросом",
+    status_code=status.HTTP_200_OK,
+    responses={
+        400: {"description": "Bad request"},
+    },
+    response_model=AchievementEligibilityBatch,
+)
+async def get_eligible_achievements_batch(
+    repo: RepoDep,
+    _current_user: CurrentUserDep,
+    payload: AchievementEligibilityBatchRequest,
+):
+    if len(payload.ids) > settings.EMPLOYEES_BATCH_MAX_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Слишком много идентификаторов, максимум {settings.EMPLOYEES_BATCH_MAX_IDS}",
+        )
+
+    try:
+        employees = await get_employees_by_ids(
+            repo.session,
+            payload.ids,
+            batch_size=settings.EMPLOYEES_BATCH_MAX_IDS,
+            key=payload.key,
+        )
+        index = await get_eligibility_index(repo.session)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Server error: {e}",
+        )
+
+    # Employees of the same division and position share one lookup
+    by_role: dict[tuple, list[int]] = {}
+    eligible: dict[int, list[int]] = {}
+    for key, emp in employees.items():
+        role = (emp.division, emp.position)
+        if role not in by_role:
+            by_role[role] = index.eligible(emp.division, emp.position, payload.period)
+        eligible[key] = by_role[role]
+    referenced = {achievement_id for ids in by_role.values() for achievement_id in ids}
+
+    return AchievementEligibilityBatch(
+        achievements={
+            achievement_id: index.get(achievement_id) for achievement_id in referenced
+        },
+        eligible=eligible,
+        missing=[key for key in dict.fromkeys(payload.ids) if key not in employees],
+    )
+
+
+@router.post(
+    "/evaluate",
+    name="Рассчитать достижения по KPI",
+    description="Проверяет условия KPI достижений направления за период по переданным показателям сотрудников",
+    status_code=status.HTTP_200_OK,
+    responses={
+        400: {"description": "Bad request"},
+    },
+    response_model=KPIEvaluation,
+)
+async def evaluate_achievements(
+    repo: RepoDep,
+    _current_user: CurrentUserDep,
+    payload: KPIEvaluationRequest,
+):
+    if len(payload.user_ids) > settings.BULK_MAX_ROWS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Слишком много сотрудников, максимум {settings.BULK_MAX_ROWS}",
+        )
+
+    try:
+        frame = KPIFrame(len(payload.user_ids), payload.metrics)
+    except KPIConditionError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    try:
+        employees = await get_employees_by_ids(
+            repo.session, payload.user_ids, batch_size=settings.BULK_BATCH_SIZE
+        )
+        index = await get_eligibility_index(repo.session)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Server error: {e}",
+        )
+
+    awards, skipped = kpi_engine.evaluate(
+        index.for_division(payload.division, payload.period),
+        frame,
+        division_positions(employees, payload.user_ids, payload.division),
+    )
+
+    return KPIEvaluation(
+        awards=[
+            KPIAward(
+                user_id=payload.user_ids[row],
+                achievement_id=achievement.id,
+                reward=achievement.reward,
+            )
+            for row, achievement in awards
+        ],
+        total_reward=sum(achievement.reward for _, achievement in awards),
+        skipped=skipped,
+        missing=[
+            user_id
+            for user_id in dict.fromkeys(payload.user_ids)
+            if user_id not in employees
+        ],
+    )
+
+
+@router.get(
+    "/leaderboard",
+    name="Получить рейтинг",
+    description="Возвращает рейтинг сотрудников направления по баллам за достижения",
+    status_code=status.HTTP_200_OK,
+    responses={
+        400: {"description": "Bad request"},
+    },
+    response_model=PointsLeaderboard,
+)
+async def get_points_leaderboard(
+    repo: RepoDep,
+    _current_user: CurrentUserDep,
+    division: str = Query(..., description="Направление"),
+    period: str = Query(
+        ALL_TIME,
+        pattern=r"^(all|\d{4}-\d{2})$",
+        description="Месяц в формате YYYY-MM или all за все время",
+    ),
+    limit: int = Query(
+        10, ge=1, le=settings.LEADERBOARD_MAX_LIMIT, description="Размер топа"
+    ),
+    user_id: int | None = Query(
+        None, description="Идентификатор Telegram для получения места сотрудника"
+    ),
+):
+    try:
+        ranking = (await get_leaderboard(repo.session)).get(division, period)
+        top = ranking.top(limit)
+        user_rank = ranking.rank(user_id) if user_id is not None else None
+        employees = await get_employees_by_ids(
+            repo.session,
+            [uid for _, uid, _ in top] + ([user_id] if user_rank else []),
+            batch_size=settings.LEADERBOARD_MAX_LIMIT + 1,
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Server error: {e}",
+        )
+
+    def entry(rank: int, uid: int, points: int) -> LeaderboardEntry:
+        employee = employees.get(uid)
+        return LeaderboardEntry(
+            rank=rank,
+            user_id=uid,
+            points=points,
+            employee=EmployeeSummary.model_validate(employee) if employee else None,
+        )
+
+    return PointsLeaderboard(
+        division=division,
+        period=period,
+        participants=len(ranking),
+        top=[entry(*item) for item in top],
+        user=entry(user_rank[0], user_id, user_rank[1]) if user_rank else None,
+    )
+
+
+@router.get(
+    "/export",
+    name="Выгрузить достижения",
+    description="Потоково выгружает достижения в NDJSON или CSV",
+    status_code=status.HTTP_200_OK,
+)
+async def export_achievements(
+    _current_user: CurrentUserDep,
+    export_format: ExportFormat = Query(
+        "ndjson", alias="format", description="Формат выгрузки: ndjson или csv"
+    ),
+    division: str | None = Query(None, description="Направление сотрудника"),
+):
+    stmt = select(Achievement).order_by(Achievement.id)
+    if division is not None:
+        stmt = stmt.where(Achievement.division == division)
+    return export_response(stmt, AchievementDTO, export_format, filename="achievements")
+
 
 @router.post(
     "/",
@@ -93,6 +441,11 @@ async def create_achievement(
                 detail="Не удалось создать достижение",
             )
 
+        created = AchievementDTO.model_validate(achievement)
+        change_feed.record(
+            "achievement", "upsert", [created.id], data=created.model_dump(mode="json")
+        )
+
         return achievement
 
     except ValidationError as e:
@@ -124,7 +477,7 @@ async def patch_achievement(
     request: Request,
     repo: RepoDep,
     _current_user: CurrentUserDep,
-    payload: PatchEmployeeDTO,
+    payload: PatchAchievementDTO,
     achievement_id: int = Query(int, description="Идентификатор достижения"),
 ):
     try:
@@ -142,6 +495,12 @@ async def patch_achievement(
             achievement_id, **update_data
         )
 
+        if updated:
+            dto = AchievementDTO.model_validate(updated)
+            change_feed.record(
+                "achievement", "upsert", [dto.id], data=dto.model_dump(mode="json")
+            )
+
         return updated
     except ValidationError as e:
         raise HTTPException(
@@ -182,6 +541,8 @@ async def delete_achievement(
                 detail="Error deleting achievement",
             )
 
+        change_feed.record("achievement", "delete", [achievement_id])
+
     except ValidationError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
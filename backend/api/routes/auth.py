@@ -1,11 +1,19 @@
+import time
 from datetime import datetime
+from typing import Any
 
 from fastapi import APIRouter, HTTPException, status
 
-from backend.api.deps import CurrentUserDep, RepoDep
-from backend.auth.utils import encode_jwt, validate_telegram_auth
+from backend.api.deps import IdentityDep, RepoDep
+from backend.auth.refresh import (
+    ACCESS_TOKEN_TYPE,
+    REFRESH_TOKEN_TYPE,
+    new_token_id,
+    revocation_store,
+)
+from backend.auth.utils import decode_jwt, encode_jwt, validate_telegram_auth
 from backend.core.config import settings
-from backend.schemas.auth import TelegramAuthData, TokenInfo, UserInfo
+from backend.schemas.auth import RefreshRequest, TelegramAuthData, TokenInfo, UserInfo
 
 router = APIRouter(
     prefix="/auth",
@@ -13,6 +21,41 @@ router = APIRouter(
 )
 
 
+async def issue_tokens(user: Any, family: str | None = None) -> TokenInfo:
+    """Sign access token and a refresh token belonging to the rotation family"""
+    jwt_payload = {
+        "sub": str(user.user_id),
+        "type": ACCESS_TOKEN_TYPE,
+        "user_id": user.user_id,
+        "fullname": user.fullname,
+        "role": user.role,
+        "username": user.username,
+        "division": user.division,
+        "position": user.position,
+    }
+    expire_minutes = (
+        settings.auth_jwt.stateless_access_token_expire_minutes
+        if settings.auth_jwt.stateless
+        else settings.auth_jwt.access_token_expire_minutes
+    )
+    access_token = await encode_jwt(payload=jwt_payload, expire_minutes=expire_minutes)
+
+    refresh_payload = {
+        "sub": str(user.user_id),
+        "type": REFRESH_TOKEN_TYPE,
+        "user_id": user.user_id,
+        "jti": new_token_id(),
+        "fam": family or new_token_id(),
+    }
+    refresh_token = await encode_jwt(
+        payload=refresh_payload,
+        expire_minutes=settings.auth_jwt.refresh_token_expire_minutes,
+    )
+
+    return TokenInfo(
+        access_token=access_token, refresh_token=refresh_token, token_type="Bearer"
+    )
+
 
 @router.post("/telegram", name="Авторизация через Telegram", response_model=TokenInfo)
 async def auth_telegram(auth_data: TelegramAuthData, repo: RepoDep):
@@ -64,22 +107,82 @@ async def auth_telegram(auth_data: TelegramAuthData, repo: RepoDep):
             status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient permissions"
         )
 
-    jwt_payload = {
-        "sub": str(user.user_id),
-        "user_id": user.user_id,
-        "fullname": user.fullname,
-        "role": user.role,
-    }
-    access_token = await encode_jwt(payload=jwt_payload)
+    return await issue_tokens(user)
 
-    return TokenInfo(access_token=access_token, token_type="Bearer")
+
+@router.post("/refresh", name="Обновление токенов", response_model=TokenInfo)
+async def refresh_tokens(data: RefreshRequest, repo: RepoDep):
+    """
+    Exchange refresh token for a new access/refresh token pair
+
+    Every refresh token is single-use. Presenting a used one revokes the whole
+    rotation family, so a leaked token stops working for both parties.
+    """
+    try:
+        payload = await decode_jwt(data.refresh_token)
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token",
+        )
+
+    jti = payload.get("jti")
+    family = payload.get("fam")
+    user_id = payload.get("user_id")
+    if (
+        payload.get("type") != REFRESH_TOKEN_TYPE
+        or not jti
+        or not family
+        or not user_id
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token",
+        )
+
+    if await revocation_store.is_family_revoked(family):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Refresh token revoked",
+        )
+
+    if not await revocation_store.mark_used(jti, expires_at=payload["exp"]):
+        await revocation_store.revoke_family(
+            family,
+            expires_at=time.time()
+            + settings.auth_jwt.refresh_token_expire_minutes * 60,
+        )
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Refresh token reuse detected",
+        )
+
+    # Re-read the employee so role changes and removals apply on refresh
+    users = await repo.employee.get_users(user_id=user_id)
+    if not users:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found in database",
+        )
+
+    user = users[0] if isinstance(users, list) else users
+
+    if user.role != 3:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient permissions"
+        )
+
+    return await issue_tokens(user, family=family)
 
 
 @router.get(
     "/me", name="Получить информацию о текущем пользователе", response_model=UserInfo
 )
-async def get_current_user_info(current_user: CurrentUserDep):
-    """Get current user information by token"""
+async def get_current_user_info(current_user: IdentityDep):
+    """Get current user information by token
+
+    In stateless mode the answer is built from token claims with no DB queries
+    """
     return UserInfo(
         user_id=current_user.user_id,
         fullname=current_user.fullname,
@@ -1,10 +1,53 @@
+import csv
+import io
+import json
 from datetime import datetime
+from typing import Any
 
 from fastapi import APIRouter, HTTPException, Query, Request, status
 from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from stp_database.models.STP import Employee
 
-from backend.api.deps import CurrentUserDep, RepoDep
-from backend.schemas.employee import EmployeeDTO, EmployeesList, PatchEmployeeDTO
+from backend.api.deps import CurrentUserDep, RepoDep, identity_cache
+from backend.api.export import ExportFormat, export_response
+from backend.api.response_cache import response_cache
+from backend.core.changes import change_feed
+from backend.core.config import settings
+from backend.core.pagination import decode_cursor, keyset_page
+from backend.employees.hierarchy import OrgChart, org_chart_cache
+from backend.employees.search import EmployeeSearchIndex, employee_index
+from backend.exchanges.matching import exchange_book
+from backend.queries.employees import (
+    bulk_update_employees,
+    bulk_upsert_employees,
+    count_employees,
+    employee_filters,
+    get_employee_ids,
+    get_employees_by_ids,
+)
+from backend.queries.fingerprint import table_fingerprint
+from backend.schemas.employee import (
+    BulkEmployeeResult,
+    BulkEmployeesResult,
+    BulkPatchEmployeesDTO,
+    BulkPatchEmployeesResult,
+    CreateEmployeeDTO,
+    EmployeeDTO,
+    EmployeesBatch,
+    EmployeesBatchRequest,
+    EmployeeSearch,
+    EmployeeSearchHit,
+    EmployeesList,
+    EmployeesSync,
+    EmployeeSummary,
+    OrgChain,
+    OrgNode,
+    OrgSubtree,
+    OrgTeamSizes,
+    PatchEmployeeDTO,
+)
 
 router = APIRouter(
     prefix="/employees",
@@ -12,18 +55,57 @@ router = APIRouter(
 )
 
 
+async def get_employee_index(session: AsyncSession) -> EmployeeSearchIndex:
+    """Return the search index, reloading it when stale and refreshing dirty rows"""
+    if employee_index.is_stale():
+        employees = await session.scalars(select(Employee))
+        employee_index.load(EmployeeDTO.model_validate(emp) for emp in employees)
+    elif employee_index.dirty:
+        dirty = list(employee_index.dirty)
+        found = await get_employees_by_ids(
+            session, dirty, settings.BULK_BATCH_SIZE, key="id"
+        )
+        for main_id in dirty:
+            if main_id in found:
+                employee_index.upsert(EmployeeDTO.model_validate(found[main_id]))
+            else:
+                employee_index.remove(main_id)
+            employee_index.dirty.discard(main_id)
+    return employee_index
+
+
+async def get_org_chart(session: AsyncSession) -> OrgChart:
+    """Return the cached org chart, rebuilding it with one query when invalidated"""
+    chart = org_chart_cache.get()
+    if chart is None:
+        employees = await session.scalars(select(Employee))
+        chart = OrgChart(EmployeeDTO.model_validate(emp) for emp in employees)
+        org_chart_cache.set(chart)
+    return chart
+
+
+def org_node(chart: OrgChart, employee_id: int, depth: int) -> OrgNode:
+    return OrgNode(
+        employee=EmployeeSummary.model_validate(chart.employees[employee_id]),
+        head_id=chart.head_of.get(employee_id),
+        depth=depth,
+        team_size=chart.team_sizes.get(employee_id, 0),
+    )
+
+
 @router.get(
     "/",
     name="Получить сотрудников",
-    description="Получает список сотрудников с фильтрами",
+    description="Получает страницу сотрудников с фильтрами, следующая страница по next_cursor",
     status_code=status.HTTP_200_OK,
     responses={
-        404: {"description": "Not found"},
+        304: {"description": "Not modified"},
         400: {"description": "Bad request"},
     },
     response_model=EmployeesList,
 )
 async def get_employees(
+    request: Request,
     repo: RepoDep,
     _current_user: CurrentUserDep,
     main_id: int | None = Query(None, description="Основной идентификатор"),
@@ -33,36 +115,311 @@ async def get_employees(
     email: str | None = Query(None, description="Рабочая почта"),
     head: str | None = Query(None, description="ФИО руководителя"),
     roles: list[int] | None = Query(None, description="Роли"),
+    limit: int = Query(
+        settings.PAGE_SIZE_DEFAULT,
+        ge=1,
+        le=settings.PAGE_SIZE_MAX,
+        description="Размер страницы",
+    ),
+    cursor: str | None = Query(None, description="Курсор следующей страницы"),
+    with_total: bool = Query(False, description="Посчитать общее количество"),
 ):
+    cache_key, etag, cached = await response_cache.lookup(
+        request, repo.session, Employee.__table__
+    )
+    if cached is not None:
+        return cached
+
+    after_id = None
+    if cursor is not None:
+        try:
+            after_id = int(decode_cursor(cursor)["id"])
+        except (ValueError, KeyError, TypeError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+            )
+
+    conditions = employee_filters(
+        main_id=main_id,
+        user_id=user_id,
+        username=username,
+        fullname=fullname,
+        email=email,
+        head=head,
+        roles=roles,
+    )
+
     try:
-        employees = await repo.employee.get_users(
-            main_id=main_id,
-            user_id=user_id,
-            username=username,
-            fullname=fullname,
-            email=email,
-            head=head,
-            roles=roles,
+        employees, next_cursor = await keyset_page(
+            repo.session,
+            select(Employee).where(*conditions),
+            Employee.id,
+            limit=limit,
+            after_id=after_id,
         )
+        total = await count_employees(repo.session, conditions) if with_total else None
 
-        if not employees:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, detail="Not found"
+        return response_cache.respond(
+            cache_key,
+            etag,
+            EmployeesList(
+                employees=[EmployeeDTO.model_validate(emp) for emp in employees],
+                next_cursor=next_cursor,
+                total=total,
+            ),
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Server error: {e}",
+        )
+
+
+@router.get(
+    "/search",
+    name="Найти сотрудников",
+    description="Поиск сотрудников по началу или приблизительному совпадению ФИО и имени пользователя",
+    status_code=status.HTTP_200_OK,
+    response_model=EmployeeSearch,
+)
+async def search_employees(
+    repo: RepoDep,
+    _current_user: CurrentUserDep,
+    q: str = Query(..., min_length=1, max_length=100, description="Поисковый запрос"),
+    division: str | None = Query(None, description="Направление сотрудника"),
+    limit: int = Query(
+        10,
+        ge=1,
+        le=settings.EMPLOYEE_SEARCH_MAX_LIMIT,
+        description="Количество результатов",
+    ),
+):
+    try:
+        index = await get_employee_index(repo.session)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Server error: {e}",
+        )
+
+    return EmployeeSearch(
+        hits=[
+            EmployeeSearchHit(employee=employee, score=score)
+            for employee, score in index.search(q, limit=limit, division=division)
+        ]
+    )
+
+
+@router.get(
+    "/hierarchy/teams",
+    name="Получить размеры команд",
+    description="Возвращает руководителей с количеством прямых и косвенных подчиненных",
+    status_code=status.HTTP_200_OK,
+    response_model=OrgTeamSizes,
+)
+async def get_team_sizes(
+    repo: RepoDep,
+    _current_user: CurrentUserDep,
+    division: str | None = Query(None, description="Направление руководителя"),
+):
+    try:
+        chart = await get_org_chart(repo.session)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Server error: {e}",
+        )
+
+    teams = [
+        org_node(chart, employee_id, 0)
+        for employee_id in chart.team_sizes
+        if division is None or chart.employees[employee_id].division == division
+    ]
+    teams.sort(key=lambda node: (-node.team_size, node.employee.fullname))
+    return OrgTeamSizes(teams=teams)
+
+
+@router.get(
+    "/hierarchy/{main_id}",
+    name="Получить подчиненных",
+    description="Возвращает всех прямых и косвенных подчиненных сотрудника",
+    status_code=status.HTTP_200_OK,
+    responses={404: {"description": "Not found"}},
+    response_model=OrgSubtree,
+)
+async def get_subordinates(
+    repo: RepoDep,
+    _current_user: CurrentUserDep,
+    main_id: int,
+    depth: int | None = Query(None, ge=1, description="Глубина обхода"),
+):
+    try:
+        chart = await get_org_chart(repo.session)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Server error: {e}",
+        )
+
+    if main_id not in chart:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+
+    return OrgSubtree(
+        root=org_node(chart, main_id, 0),
+        subordinates=[
+            org_node(chart, employee_id, level)
+            for employee_id, level in chart.subtree(main_id, max_depth=depth)
+        ],
+    )
+
+
+@router.get(
+    "/hierarchy/{main_id}/chain",
+    name="Получить цепочку руководителей",
+    description="Возвращает руководителей сотрудника от непосредственного до верхнего",
+    status_code=status.HTTP_200_OK,
+    responses={404: {"description": "Not found"}},
+    response_model=OrgChain,
+)
+async def get_chain_of_command(
+    repo: RepoDep,
+    _current_user: CurrentUserDep,
+    main_id: int,
+):
+    try:
+        chart = await get_org_chart(repo.session)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Server error: {e}",
+        )
+
+    if main_id not in chart:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+
+    return OrgChain(
+        employee=org_node(chart, main_id, 0),
+        chain=[
+            org_node(chart, head_id, -level)
+            for level, head_id in enumerate(chart.chain(main_id), start=1)
+        ],
+    )
+
+
+@router.get(
+    "/sync",
+    name="Синхронизировать сотрудников",
+    description="Возвращает сотрудников, измененных или удаленных после выдачи токена синхронизации",
+    status_code=status.HTTP_200_OK,
+    response_model=EmployeesSync,
+)
+async def sync_employees(
+    repo: RepoDep,
+    _current_user: CurrentUserDep,
+    sync_token: str | None = Query(
+        None, alias="token", description="Токен из предыдущего ответа"
+    ),
+):
+    try:
+        fingerprint = await table_fingerprint(repo.session, Employee.__table__)
+        changes, next_token = change_feed.delta("employee", sync_token, fingerprint)
+        if changes is None:
+            employees = await repo.employee.get_users()
+            if not isinstance(employees, (list, tuple)):
+                employees = [employees] if employees else []
+
+            return EmployeesSync(
+                reset=True,
+                employees=[EmployeeDTO.model_validate(emp) for emp in employees],
+                deleted=[],
+                sync_token=next_token,
             )
 
-        if not isinstance(employees, (list, tuple)):
-            employees = [employees]
+        upserted = [key for key, op in changes.items() if op == "upsert"]
+        rows = (
+            await get_employees_by_ids(
+                repo.session, upserted, settings.BULK_BATCH_SIZE, key="id"
+            )
+            if upserted
+            else {}
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Server error: {e}",
+        )
 
-        employees = [EmployeeDTO.model_validate(emp) for emp in employees]
+    return EmployeesSync(
+        reset=False,
+        employees=[EmployeeDTO.model_validate(emp) for emp in rows.values()],
+        deleted=[key for key in changes if key not in rows],
+        sync_token=next_token,
+    )
 
-        return EmployeesList(employees=employees)
 
+@router.get(
+    "/export",
+    name="Выгрузить сотрудников",
+    description="Потоково выгружает сотрудников в NDJSON или CSV",
+    status_code=status.HTTP_200_OK,
+)
+async def export_employees(
+    _current_user: CurrentUserDep,
+    export_format: ExportFormat = Query(
+        "ndjson", alias="format", description="Формат выгрузки: ndjson или csv"
+    ),
+    head: str | None = Query(None, description="ФИО руководителя"),
+    roles: list[int] | None = Query(None, description="Роли"),
+):
+    stmt = (
+        select(Employee)
+        .where(*employee_filters(head=head, roles=roles))
+        .order_by(Employee.id)
+    )
+    return export_response(stmt, EmployeeDTO, export_format, filename="employees")
+
+
+@router.post(
+    "/batch",
+    name="Получить сотрудников по списку",
+    description="Получает сотрудников по списку идентификаторов одним запросом",
+    status_code=status.HTTP_200_OK,
+    responses={
+        400: {"description": "Bad request"},
+    },
+    response_model=EmployeesBatch,
+)
+async def get_employees_batch(
+    repo: RepoDep,
+    _current_user: CurrentUserDep,
+    payload: EmployeesBatchRequest,
+):
+    if len(payload.ids) > settings.EMPLOYEES_BATCH_MAX_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Слишком много идентификаторов, максимум {settings.EMPLOYEES_BATCH_MAX_IDS}",
+        )
+
+    try:
+        employees = await get_employees_by_ids(
+            repo.session,
+            payload.ids,
+            batch_size=settings.EMPLOYEES_BATCH_MAX_IDS,
+            key=payload.key,
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Server error: {e}",
         )
 
+    return EmployeesBatch(
+        employees={
+            key: EmployeeDTO.model_validate(emp) for key, emp in employees.items()
+        },
+        missing=[key for key in dict.fromkeys(payload.ids) if key not in employees],
+    )
+
 
 @router.post(
     "/",
@@ -98,6 +455,11 @@ async def create_employee(
                 detail="Не удалось создать сотрудника",
             )
 
+        created = EmployeeDTO.model_validate(employee)
+        change_feed.record(
+            "employee", "upsert", [created.id], data=created.model_dump(mode="json")
+        )
+
         return employee
 
     except ValidationError as e:
@@ -118,6 +480,216 @@ async def create_employee(
         )
 
 
+def parse_bulk_body(content_type: str, body: bytes) -> list[dict[str, Any]]:
+    """Parse JSON array or CSV with a header row into raw row dicts"""
+    text = body.decode("utf-8-sig")
+    if content_type.startswith("text/csv"):
+        reader = csv.DictReader(io.StringIO(text))
+        # Empty cells mean "not provided", not an empty string
+        return [{k: v for k, v in row.items() if v not in ("", None)} for row in reader]
+
+    rows = json.loads(text)
+    if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+        raise ValueError("Expected JSON array of objects")
+    return rows
+
+
+@router.post(
+    "/bulk",
+    name="Массово создать сотрудников",
+    description="Создает или обновляет сотрудников из JSON-массива или CSV одной транзакцией",
+    status_code=status.HTTP_200_OK,
+    responses={
+        400: {"description": "Bad request"},
+    },
+    response_model=BulkEmployeesResult,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {
+                    "schema": {
+                        "type": "array",
+                        "items": CreateEmployeeDTO.model_json_schema(),
+                    }
+                },
+                "text/csv": {"schema": {"type": "string"}},
+            },
+        }
+    },
+)
+async def bulk_create_employees(
+    request: Request,
+    repo: RepoDep,
+    _current_user: CurrentUserDep,
+    upsert: bool = Query(False, description="Обновлять существующих по user_id"),
+):
+    try:
+        raw_rows = parse_bulk_body(
+            request.headers.get("content-type", ""), await request.body()
+        )
+    except (ValueError, UnicodeDecodeError, csv.Error) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Ошибка разбора входных данных: {e}",
+        )
+
+    if len(raw_rows) > settings.BULK_MAX_ROWS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Слишком много строк, максимум {settings.BULK_MAX_ROWS}",
+        )
+
+    # Validate every row before writing anything
+    rows: list[CreateEmployeeDTO] = []
+    errors: list[BulkEmployeeResult] = []
+    seen_user_ids: set[int] = set()
+    for index, raw_row in enumerate(raw_rows):
+        try:
+            row = CreateEmployeeDTO.model_validate(raw_row)
+        except ValidationError as e:
+            errors.append(
+                BulkEmployeeResult(index=index, status="error", detail=str(e))
+            )
+            continue
+
+        if row.user_id is not None:
+            if row.user_id in seen_user_ids:
+                errors.append(
+                    BulkEmployeeResult(
+                        index=index,
+                        status="error",
+                        user_id=row.user_id,
+                        detail="Повторяющийся user_id",
+                    )
+                )
+                continue
+            seen_user_ids.add(row.user_id)
+        rows.append(row)
+
+    if errors:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=BulkEmployeesResult(
+                created=0, updated=0, skipped=0, results=errors
+            ).model_dump(),
+        )
+
+    try:
+        outcomes = await bulk_upsert_employees(
+            repo.session, rows, upsert=upsert, batch_size=settings.BULK_BATCH_SIZE
+        )
+        await repo.session.commit()
+    except Exception:
+        await repo.session.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail={
+                "timestamp": datetime.now().isoformat(),
+                "path": str(request.url.path),
+                "message": "Внутренняя ошибка сервера при массовом создании сотрудников",
+                "errorCode": "INTERNAL_SERVER_ERROR",
+            },
+        )
+
+    results = [
+        BulkEmployeeResult(index=index, status=status_, id=main_id, user_id=row.user_id)
+        for index, (row, (status_, main_id)) in enumerate(
+            zip(rows, outcomes, strict=True)
+        )
+    ]
+    for row, result in zip(rows, results, strict=True):
+        if result.status == "updated":
+            identity_cache.pop(result.user_id)
+        if (
+            result.status != "skipped"
+            and row.user_id is not None
+            and row.is_exchange_banned is not None
+        ):
+            exchange_book.set_banned(row.user_id, row.is_exchange_banned)
+    change_feed.record(
+        "employee",
+        "upsert",
+        [result.id for result in results if result.status != "skipped"],
+    )
+
+    return BulkEmployeesResult(
+        created=sum(result.status == "created" for result in results),
+        updated=sum(result.status == "updated" for result in results),
+        skipped=sum(result.status == "skipped" for result in results),
+        results=results,
+    )
+
+
+@router.patch(
+    "/bulk",
+    name="Массово изменить сотрудников",
+    description="Изменяет сотрудников по списку идентификаторов Telegram или фильтрам одним запросом",
+    status_code=status.HTTP_200_OK,
+    responses={
+        400: {"description": "Bad request"},
+    },
+    response_model=BulkPatchEmployeesResult,
+)
+async def bulk_patch_employees(
+    request: Request,
+    repo: RepoDep,
+    _current_user: CurrentUserDep,
+    payload: BulkPatchEmployeesDTO,
+):
+    conditions = []
+    if payload.user_ids is not None:
+        conditions.append(Employee.user_id.in_(payload.user_ids))
+    if payload.filters is not None:
+        conditions += employee_filters(**payload.filters.model_dump())
+
+    if not conditions:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Укажите user_ids или filters",
+        )
+
+    update_data = payload.patch.model_dump(exclude_unset=True)
+    if not update_data:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Пустой набор изменений"
+        )
+    if "user_id" in update_data:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="user_id нельзя изменить массово",
+        )
+
+    try:
+        affected = await bulk_update_employees(repo.session, conditions, update_data)
+        await repo.session.commit()
+    except Exception:
+        await repo.session.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail={
+                "timestamp": datetime.now().isoformat(),
+                "path": str(request.url.path),
+                "message": "Внутренняя ошибка сервера при массовом обновлении сотрудников",
+                "errorCode": "INTERNAL_SERVER_ERROR",
+            },
+        )
+
+    user_ids = [user_id for _, user_id in affected if user_id is not None]
+    for user_id in user_ids:
+        identity_cache.pop(user_id)
+        if "is_exchange_banned" in update_data:
+            exchange_book.set_banned(user_id, update_data["is_exchange_banned"])
+
+    change_feed.record("employee", "upsert", [main_id for main_id, _ in affected])
+
+    return BulkPatchEmployeesResult(
+        updated=len(affected),
+        ids=[main_id for main_id, _ in affected],
+        user_ids=user_ids,
+    )
+
+
 @router.patch(
     "/",
     name="Изменить сотрудника",
@@ -143,6 +715,20 @@ async def patch_employee(
         update_data = payload.model_dump(exclude_unset=True)
         updated = await repo.employee.update_user(user_id, **update_data)
 
+        identity_cache.pop(user_id)
+        if payload.user_id is not None:
+            identity_cache.pop(payload.user_id)
+        if payload.is_exchange_banned is not None:
+            exchange_book.set_banned(
+                payload.user_id or user_id, payload.is_exchange_banned
+            )
+
+        if updated:
+            dto = EmployeeDTO.model_validate(updated)
+            change_feed.record(
+                "employee", "upsert", [dto.id], data=dto.model_dump(mode="json")
+            )
+
         return updated
     except ValidationError as e:
         raise HTTPException(
@@ -174,6 +760,13 @@ async def delete_employee(
     user_id: int | None = Query(None, description="Идентификатор Telegram сотрудника"),
 ):
     try:
+        deleted_ids = (
+            await get_employee_ids(
+                repo.session, employee_filters(user_id=user_id, fullname=fullname)
+            )
+            if user_id is not None or fullname is not None
+            else []
+        )
         deleted_count = await repo.employee.delete_user(
             fullname=fullname, user_id=user_id
         )
@@ -183,6 +776,12 @@ async def delete_employee(
                 status_code=status.HTTP_404_NOT_FOUND, detail="No one deleted"
             )
 
+        if user_id is not None:
+            identity_cache.pop(user_id)
+        if fullname is not None:
+            identity_cache.invalidate_where(lambda emp: emp.fullname == fullname)
+        change_feed.record("employee", "delete", deleted_ids)
+
         return deleted_count
 
     except ValidationError as e:
@@ -0,0 +1,58 @@
+from fastapi import APIRouter, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+
+from backend.api.deps import CurrentUserDep
+from backend.core.config import settings
+from backend.core.events import broadcaster
+
+router = APIRouter(
+    prefix="/events",
+    tags=["События"],
+)
+
+RESOURCES = ("employee", "achievement", "exchange")
+
+
+@router.get(
+    "/",
+    name="Подписаться на изменения",
+    description="Поток Server-Sent Events об изменениях сотрудников, достижений и сделок",
+    status_code=status.HTTP_200_OK,
+    responses={
+        400: {"description": "Bad request"},
+        503: {"description": "Too many subscribers"},
+    },
+)
+async def subscribe_events(
+    _current_user: CurrentUserDep,
+    resources: list[str] | None = Query(
+        None, description="Типы ресурсов: employee, achievement, exchange"
+    ),
+    ids: list[int] | None = Query(None, description="Идентификаторы записей"),
+):
+    selected = (
+        {part.strip() for value in resources for part in value.split(",")} - {""}
+        if resources
+        else None
+    )
+    if selected is not None and not selected <= set(RESOURCES):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"resources поддерживает только {', '.join(RESOURCES)}",
+        )
+
+    if broadcaster.full:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Слишком много подписчиков",
+        )
+
+    return StreamingResponse(
+        broadcaster.stream(
+            keepalive=settings.EVENTS_KEEPALIVE_SECONDS,
+            resources=selected,
+            keys=set(ids) if ids else None,
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
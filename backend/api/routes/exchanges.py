@@ -1,17 +1,100 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from fastapi import APIRouter, HTTPException, Query, Request, status
 from pydantic import ValidationError
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from stp_database.models.STP import Exchange
 
 from backend.api.deps import CurrentUserDep, RepoDep
-from backend.schemas.employee import EmployeeDTO, EmployeesList, PatchEmployeeDTO
-from backend.schemas.exchanges import ExchangesList
+from backend.core.cache import TTLCache
+from backend.core.changes import change_feed
+from backend.core.config import settings
+from backend.core.pagination import decode_cursor
+from backend.exchanges.intervals import IntervalIndex
+from backend.exchanges.matching import ExchangeBook, exchange_book
+from backend.queries.employees import (
+    get_employees_by_ids,
+    get_exchange_banned_user_ids,
+)
+from backend.queries.exchanges import (
+    ExchangeGroupBy,
+    ExchangeSplitBy,
+    aggregate_exchanges,
+    exchange_filters,
+    get_exchanges_page,
+    get_open_exchanges,
+    get_open_exchanges_between,
+)
+from backend.schemas.employee import EmployeeSummary
+from backend.schemas.exchanges import (
+    ExchangeDTO,
+    ExchangeMatch,
+    ExchangeMatches,
+    ExchangeOverlapRequest,
+    ExchangeOverlaps,
+    ExchangesList,
+    ExchangeStats,
+    ExchangeStatsRow,
+    ExpandedExchangeDTO,
+    PatchExchangeDTO,
+    WindowOverlaps,
+)
 
 router = APIRouter(
     prefix="/exchanges",
     tags=["Сделки"],
 )
 
+# Aggregates of periods that already ended, dropped on any exchange write
+stats_cache: TTLCache[tuple, ExchangeStats] = TTLCache(
+    maxsize=settings.EXCHANGE_STATS_CACHE_SIZE,
+    ttl=settings.EXCHANGE_STATS_CACHE_TTL_SECONDS,
+)
+
+
+async def get_exchange_book(session: AsyncSession) -> ExchangeBook:
+    """Return the matching book, reloading it from the database when stale"""
+    if exchange_book.is_stale():
+        exchanges = await get_open_exchanges(session, settings.EXCHANGE_OPEN_STATUSES)
+        banned = await get_exchange_banned_user_ids(session)
+        exchange_book.load(
+            [ExchangeDTO.model_validate(exc) for exc in exchanges], banned
+        )
+    return exchange_book
+
+
+EXPANDABLE_PARTIES = ("owner", "counterpart")
+
+
+async def expand_exchanges(
+    session: AsyncSession, exchanges: list, parties: set[str]
+) -> list[ExpandedExchangeDTO]:
+    """Inline employee summaries of the requested parties using one batched query"""
+    user_ids = [
+        user_id
+        for exc in exchanges
+        for party in parties
+        if (user_id := getattr(exc, f"{party}_id")) is not None
+    ]
+    employees = (
+        await get_employees_by_ids(session, user_ids, settings.BULK_BATCH_SIZE)
+        if user_ids
+        else {}
+    )
+    summaries = {
+        user_id: EmployeeSummary.model_validate(employee)
+        for user_id, employee in employees.items()
+    }
+
+    return [
+        ExpandedExchangeDTO(
+            **dict(ExchangeDTO.model_validate(exc)),
+            **{party: summaries.get(getattr(exc, f"{party}_id")) for party in parties},
+        )
+        for exc in exchanges
+    ]
+
 
 @router.get(
     "/",
@@ -19,7 +102,6 @@ router = APIRouter(
     description="Получает список сделок с фильтрами",
     status_code=status.HTTP_200_OK,
     responses={
-        404: {"description": "Not found"},
         400: {"description": "Bad request"},
     },
     response_model=ExchangesList,
@@ -27,29 +109,69 @@ router = APIRouter(
 async def get_exchanges(
     repo: RepoDep,
     _current_user: CurrentUserDep,
+    owner_id: int | None = Query(None, description="Идентификатор владельца сделки"),
+    counterpart_id: int | None = Query(
+        None, description="Идентификатор второй стороны сделки"
+    ),
+    employee_id: int | None = Query(
+        None, description="Идентификатор владельца или второй стороны сделки"
+    ),
+    statuses: list[str] | None = Query(None, alias="status", description="Статусы"),
+    is_paid: bool | None = Query(None, description="Оплачена ли сделка"),
+    start_time: datetime | None = Query(
+        None, description="Начало смены не раньше указанного времени"
+    ),
+    end_time: datetime | None = Query(
+        None, description="Начало смены раньше указанного времени"
+    ),
+    limit: int = Query(
+        settings.PAGE_SIZE_DEFAULT,
+        ge=1,
+        le=settings.PAGE_SIZE_MAX,
+        description="Размер страницы",
+    ),
+    cursor: str | None = Query(None, description="Курсор следующей страницы"),
+    expand: list[str] | None = Query(
+        None, description="Встроить данные сотрудников: owner, counterpart"
+    ),
 ):
-    try:
-        exchanges = await repo.exchange.get_exchanges(
-            main_id=main_id,
-            user_id=user_id,
-            username=username,
-            fullname=fullname,
-            email=email,
-            head=head,
-            roles=roles,
+    parties = {part.strip() for value in expand or () for part in value.split(",")}
+    parties.discard("")
+    if not parties <= set(EXPANDABLE_PARTIES):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"expand поддерживает только {', '.join(EXPANDABLE_PARTIES)}",
         )
 
-        if not exchanges:
+    after = None
+    if cursor is not None:
+        try:
+            values = decode_cursor(cursor)
+            after = (datetime.fromisoformat(values["start"]), int(values["id"]))
+        except (ValueError, KeyError, TypeError):
             raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, detail="Not found"
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
             )
 
-        if not isinstance(exchanges, (list, tuple)):
-            exchanges = [exchanges]
+    conditions = exchange_filters(
+        owner_id=owner_id,
+        counterpart_id=counterpart_id,
+        employee_id=employee_id,
+        statuses=statuses,
+        is_paid=is_paid,
+        start_time=start_time,
+        end_time=end_time,
+    )
 
-        exchanges = [EmployeeDTO.model_validate(emp) for emp in exchanges]
+    try:
+        exchanges, next_cursor = await get_exchanges_page(
+            repo.session, conditions, limit=limit, after=after
+        )
 
-        return EmployeesList(employees=exchanges)
+        return ExchangesList(
+            exchanges=await expand_exchanges(repo.session, exchanges, parties),
+            next_cursor=next_cursor,
+        )
 
     except Exception as e:
         raise HTTPException(
@@ -58,86 +180,245 @@ async def get_exchanges(
         )
 
 
-@router.post(
-    "/",
-    name="Создать сотрудника",
-    description="Создает нового сотрудника",
-    status_code=status.HTTP_201_CREATED,
-    response_model=EmployeeDTO,
+@router.get(
+    "/stats",
+    name="Получить статистику сделок",
+    description="Агрегирует количество и сумму сделок по владельцу, второй стороне или периоду",
+    status_code=status.HTTP_200_OK,
+    response_model=ExchangeStats,
 )
-async def create_employee(
-    request: Request,
+async def get_exchange_stats(
     repo: RepoDep,
     _current_user: CurrentUserDep,
-    division: str = Query(str, description="Направление сотрудника"),
-    position: str = Query(str, description="Должность сотрудника"),
-    fullname: str = Query(str, description="ФИО сотрудника"),
-    head: str = Query(str, description="Руководитель сотрудника"),
-    role: int = Query(0, description="Роль сотрудника"),
-    user_id: int | None = Query(None, description="Идентификатор Telegram сотрудника"),
+    group_by: ExchangeGroupBy = Query(
+        ..., description="Группировка: owner, counterpart, day, week или month"
+    ),
+    split_by: ExchangeSplitBy | None = Query(
+        None, description="Дополнительная разбивка: status или payment_type"
+    ),
+    owner_id: int | None = Query(None, description="Идентификатор владельца сделки"),
+    counterpart_id: int | None = Query(
+        None, description="Идентификатор второй стороны сделки"
+    ),
+    statuses: list[str] | None = Query(None, alias="status", description="Статусы"),
+    is_paid: bool | None = Query(None, description="Оплачена ли сделка"),
+    start_time: datetime | None = Query(
+        None, description="Начало смены не раньше указанного времени"
+    ),
+    end_time: datetime | None = Query(
+        None, description="Начало смены раньше указанного времени"
+    ),
 ):
+    # Only closed periods are cached, open ones still receive new exchanges
+    cache_key = None
+    if end_time is not None and end_time <= datetime.now(end_time.tzinfo):
+        cache_key = (
+            group_by,
+            split_by,
+            owner_id,
+            counterpart_id,
+            tuple(sorted(statuses or ())),
+            is_paid,
+            start_time,
+            end_time,
+        )
+        cached = stats_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    conditions = exchange_filters(
+        owner_id=owner_id,
+        counterpart_id=counterpart_id,
+        statuses=statuses,
+        is_paid=is_paid,
+        start_time=start_time,
+        end_time=end_time,
+    )
+
     try:
-        employee = await repo.employee.add_user(
-            division=division,
-            position=position,
-            fullname=fullname,
-            head=head,
-            role=role,
-            user_id=user_id,
+        rows = await aggregate_exchanges(
+            repo.session, conditions, group_by=group_by, split_by=split_by
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Server error: {e}",
         )
 
-        if not employee:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Не удалось создать сотрудника",
+    stats = ExchangeStats(
+        group_by=group_by,
+        split_by=split_by,
+        rows=[
+            ExchangeStatsRow(
+                key=str(key) if key is not None else None,
+                split=split,
+                count=count,
+                total_price=total_price,
+                paid_count=paid_count,
+                unpaid_count=count - paid_count,
             )
+            for key, split, count, total_price, paid_count in rows
+        ],
+    )
 
-        return employee
+    if cache_key is not None:
+        stats_cache.set(cache_key, stats)
 
-    except ValidationError as e:
+    return stats
+
+
+@router.post(
+    "/overlap",
+    name="Найти пересекающиеся сделки",
+    description="Находит открытые сделки, пересекающиеся с каждым из переданных интервалов смен",
+    status_code=status.HTTP_200_OK,
+    responses={
+        400: {"description": "Bad request"},
+    },
+    response_model=ExchangeOverlaps,
+)
+async def find_overlapping_exchanges(
+    repo: RepoDep,
+    _current_user: CurrentUserDep,
+    payload: ExchangeOverlapRequest,
+):
+    if len(payload.windows) > settings.EXCHANGE_OVERLAP_MAX_WINDOWS:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Ошибка валидации входных данных: {e}",
+            detail=f"Слишком много интервалов, максимум {settings.EXCHANGE_OVERLAP_MAX_WINDOWS}",
         )
 
-    except Exception:
+    # One query covers all windows, each window is then a bisect lookup
+    try:
+        exchanges = await get_open_exchanges_between(
+            repo.session,
+            windows=[
+                (window.start_time, window.end_time) for window in payload.windows
+            ],
+            statuses=settings.EXCHANGE_OPEN_STATUSES,
+            max_duration=timedelta(hours=settings.EXCHANGE_MAX_DURATION_HOURS),
+            division=payload.division,
+            owner_intent=payload.owner_intent,
+            include_private=payload.include_private,
+        )
+    except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail={
-                "timestamp": datetime.now().isoformat(),
-                "path": str(request.url.path),
-                "message": "Внутренняя ошибка сервера при создании сотрудника",
-                "errorCode": "INTERNAL_SERVER_ERROR",
-            },
+            detail=f"Server error: {e}",
+        )
+
+    index = IntervalIndex((exc.start_time, exc.end_time, exc.id) for exc in exchanges)
+    windows = [
+        WindowOverlaps(
+            start_time=window.start_time,
+            end_time=window.end_time,
+            exchange_ids=index.overlapping(window.start_time, window.end_time),
         )
+        for window in payload.windows
+    ]
+    matched = {exchange_id for window in windows for exchange_id in window.exchange_ids}
+
+    return ExchangeOverlaps(
+        windows=windows,
+        exchanges={
+            exc.id: ExchangeDTO.model_validate(exc)
+            for exc in exchanges
+            if exc.id in matched
+        },
+    )
+
+
+@router.get(
+    "/{exchange_id}/matches",
+    name="Подобрать встречные сделки",
+    description="Подбирает встречные сделки, пересекающиеся по времени, с учетом цены и блокировок",
+    status_code=status.HTTP_200_OK,
+    responses={
+        404: {"description": "Not found"},
+    },
+    response_model=ExchangeMatches,
+)
+async def get_exchange_matches(
+    repo: RepoDep,
+    _current_user: CurrentUserDep,
+    exchange_id: int,
+    price_min: int | None = Query(None, description="Минимальная цена"),
+    price_max: int | None = Query(None, description="Максимальная цена"),
+    limit: int = Query(20, ge=1, le=100, description="Количество результатов"),
+):
+    try:
+        book = await get_exchange_book(repo.session)
+
+        exchange = book.get(exchange_id)
+        if exchange is None:
+            row = await repo.session.get(Exchange, exchange_id)
+            if row is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND, detail="Not found"
+                )
+            exchange = ExchangeDTO.model_validate(row)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Server error: {e}",
+        )
+
+    matches = book.match(
+        exchange, price_min=price_min, price_max=price_max, limit=limit
+    )
+
+    return ExchangeMatches(
+        exchange_id=exchange_id,
+        matches=[
+            ExchangeMatch(exchange=candidate, score=score)
+            for candidate, score in matches
+        ],
+    )
 
 
 @router.patch(
     "/",
-    name="Изменить сотрудника",
-    description="Изменяет существующего сотрудника",
+    name="Изменить сделку",
+    description="Изменяет существующую сделку",
     status_code=status.HTTP_200_OK,
-    response_model=EmployeeDTO,
+    response_model=ExchangeDTO,
 )
-async def patch_employee(
+async def patch_exchange(
     request: Request,
     repo: RepoDep,
     _current_user: CurrentUserDep,
-    payload: PatchEmployeeDTO,
-    user_id: int = Query(int, description="Идентификатор Telegram сотрудника"),
+    payload: PatchExchangeDTO,
+    exchange_id: int = Query(..., description="Идентификатор сделки"),
 ):
     try:
-        employee = await repo.employee.get_users(user_id=user_id)
+        exchange = await repo.session.get(Exchange, exchange_id)
 
-        if not employee:
+        if not exchange:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="Not found"
             )
 
         update_data = payload.model_dump(exclude_unset=True)
-        updated = await repo.employee.update_user(user_id, **update_data)
+        for field, value in update_data.items():
+            setattr(exchange, field, value)
+        await repo.session.commit()
+        await repo.session.refresh(exchange)
+        stats_cache.clear()
+
+        updated = ExchangeDTO.model_validate(exchange)
+        change_feed.record(
+            "exchange", "upsert", [updated.id], data=updated.model_dump(mode="json")
+        )
+        if updated.status in settings.EXCHANGE_OPEN_STATUSES:
+            exchange_book.upsert(updated)
+        else:
+            exchange_book.remove(updated.id)
 
         return updated
+    except HTTPException:
+        raise
     except ValidationError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -149,7 +430,7 @@ async def patch_employee(
             detail={
                 "timestamp": datetime.now().isoformat(),
                 "path": str(request.url.path),
-                "message": "Внутренняя ошибка сервера при обновлении сотрудника",
+                "message": "Внутренняя ошибка сервера при обновлении сделки",
                 "errorCode": "INTERNAL_SERVER_ERROR",
             },
         )
@@ -157,41 +438,41 @@ async def patch_employee(
 
 @router.delete(
     "/",
-    name="Удалить сотрудника",
+    name="Удалить сделку",
     status_code=status.HTTP_200_OK,
 )
-async def delete_employee(
+async def delete_exchange(
     request: Request,
     repo: RepoDep,
     _current_user: CurrentUserDep,
-    fullname: str | None = Query(None, description="ФИО сотрудника"),
-    user_id: int | None = Query(None, description="Идентификатор Telegram сотрудника"),
+    exchange_id: int = Query(..., description="Идентификатор сделки"),
 ):
     try:
-        deleted_count = await repo.employee.delete_user(
-            fullname=fullname, user_id=user_id
+        result = await repo.session.execute(
+            delete(Exchange).where(Exchange.id == exchange_id)
         )
+        await repo.session.commit()
+        stats_cache.clear()
+        exchange_book.remove(exchange_id)
+        if result.rowcount > 0:
+            change_feed.record("exchange", "delete", [exchange_id])
 
-        if deleted_count <= 0:
+        if result.rowcount <= 0:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="No one deleted"
             )
 
-        return deleted_count
-
-    except ValidationError as e:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Ошибка валидации входных данных: {e}",
-        )
+        return result.rowcount
 
+    except HTTPException:
+        raise
     except Exception:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail={
                 "timestamp": datetime.now().isoformat(),
                 "path": str(request.url.path),
-                "message": "Внутренняя ошибка сервера при удалении сотрудника",
+                "message": "Внутренняя ошибка сервера при удалении сделки",
                 "errorCode": "INTERNAL_SERVER_ERROR",
             },
         )
@@ -0,0 +1,50 @@
+from dataclasses import asdict
+
+from fastapi import APIRouter, status
+
+from backend.achievements.scheduler import award_scheduler
+from backend.api.deps import IdentityDep, identity_cache
+from backend.api.response_cache import response_cache
+from backend.api.routes.exchanges import stats_cache
+from backend.auth.utils import token_cache
+from backend.schemas.metrics import CachesStats, CacheStats, JobsStats, JobStats
+
+router = APIRouter(
+    prefix="/metrics",
+    tags=["Метрики"],
+)
+
+
+@router.get(
+    "/cache",
+    name="Получить статистику кешей",
+    description="Получает размер и соотношение попаданий внутренних кешей",
+    status_code=status.HTTP_200_OK,
+    response_model=CachesStats,
+)
+async def get_cache_stats(_current_user: IdentityDep):
+    return CachesStats(
+        caches={
+            "token": CacheStats(**token_cache.stats()),
+            "identity": CacheStats(**identity_cache.stats()),
+            "exchange_stats": CacheStats(**stats_cache.stats()),
+            "responses": CacheStats(**response_cache.stats()),
+        }
+    )
+
+
+@router.get(
+    "/jobs",
+    name="Получить статистику задач",
+    description="Получает время выполнения и количество записей задач начисления достижений",
+    status_code=status.HTTP_200_OK,
+    response_model=JobsStats,
+)
+async def get_job_stats(_current_user: IdentityDep):
+    return JobsStats(
+        running=award_scheduler.running,
+        jobs={
+            period: JobStats(**asdict(stats))
+            for period, stats in award_scheduler.stats.items()
+        },
+    )
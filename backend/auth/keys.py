@@ -0,0 +1,121 @@
+import base64
+import hashlib
+import logging
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from cryptography.hazmat.primitives import serialization
+from jwt.algorithms import get_default_algorithms
+
+from backend.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def key_id(public_key: Any) -> str:
+    """Short stable identifier of a public key (truncated SHA-256 of its DER form)"""
+    der = public_key.public_bytes(
+        encoding=serialization.Encoding.DER,
+        format=serialization.PublicFormat.SubjectPublicKeyInfo,
+    )
+    digest = hashlib.sha256(der).digest()
+    return base64.urlsafe_b64encode(digest[:12]).decode()
+
+
+class KeyRing:
+    """Parsed JWT keys selected by kid, reloaded when the key files change
+
+    The private key signs new tokens. Every public key in public_key_paths is
+    accepted for verification, so during rotation the previous public key can
+    stay listed until tokens signed with it expire.
+    """
+
+    def __init__(
+        self,
+        private_key_path: Path,
+        public_key_paths: list[Path],
+        algorithm: str,
+        reload_interval: float,
+    ):
+        self.private_key_path = private_key_path
+        self.public_key_paths = public_key_paths
+        self.algorithm = algorithm
+        self.reload_interval = reload_interval
+        self.on_reload: list[Callable[[], None]] = []
+
+        self._algorithm = get_default_algorithms()[algorithm]
+        self._mtimes: dict[Path, float] = {}
+        self._checked_at = float("-inf")
+        self._signing_kid: str | None = None
+        self._signing_key: Any = None
+        self._public_keys: dict[str, Any] = {}
+        self._primary_kid: str | None = None
+
+    def signing_key(self) -> tuple[str | None, Any]:
+        self.refresh()
+        return self._signing_kid, self._signing_key
+
+    def verification_key(self, kid: str | None) -> Any | None:
+        """Public key for kid; tokens without kid are checked with the primary key"""
+        self.refresh()
+        return self._public_keys.get(kid or self._primary_kid)
+
+    def _stat(self) -> dict[Path, float]:
+        paths = [self.private_key_path, *self.public_key_paths]
+        return {path: path.stat().st_mtime for path in paths if path.exists()}
+
+    def refresh(self) -> None:
+        """Reload keys if the files changed, checked at most once per reload_interval"""
+        now = time.monotonic()
+        if now - self._checked_at < self.reload_interval:
+            return
+        self._checked_at = now
+
+        mtimes = self._stat()
+        if mtimes == self._mtimes:
+            return
+
+        try:
+            self._load()
+        except Exception:
+            if self._signing_key is None:
+                raise
+            logger.exception("Failed to reload JWT keys, keeping previous ones")
+            return
+
+        self._mtimes = mtimes
+        for callback in self.on_reload:
+            callback()
+
+    def _load(self) -> None:
+        signing_key = self._algorithm.prepare_key(self.private_key_path.read_bytes())
+        signing_kid = key_id(signing_key.public_key())
+
+        public_keys: dict[str, Any] = {}
+        primary_kid = None
+        for path in self.public_key_paths:
+            if not path.exists():
+                continue
+            public_key = self._algorithm.prepare_key(path.read_bytes())
+            kid = key_id(public_key)
+            public_keys[kid] = public_key
+            if primary_kid is None:
+                primary_kid = kid
+
+        self._signing_kid = signing_kid
+        self._signing_key = signing_key
+        self._public_keys = public_keys
+        self._primary_kid = primary_kid
+
+
+keyring = KeyRing(
+    private_key_path=settings.auth_jwt.private_key_path,
+    public_key_paths=[
+        settings.auth_jwt.public_key_path,
+        *settings.auth_jwt.extra_public_key_paths,
+    ],
+    algorithm=settings.auth_jwt.algorithm,
+    reload_interval=settings.auth_jwt.key_reload_interval_seconds,
+)
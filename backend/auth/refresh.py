@@ -0,0 +1,70 @@
+import time
+import uuid
+from abc import ABC, abstractmethod
+
+ACCESS_TOKEN_TYPE = "access"
+REFRESH_TOKEN_TYPE = "refresh"
+
+
+def new_token_id() -> str:
+    return uuid.uuid4().hex
+
+
+class RevocationStore(ABC):
+    """Server-side state of refresh tokens: used token ids and revoked families
+
+    A family is the chain of refresh tokens produced by rotation from one login.
+    Presenting an already used token means it leaked, so its family is revoked.
+    Entries are only kept until the token they describe would expire anyway.
+    """
+
+    @abstractmethod
+    async def mark_used(self, jti: str, expires_at: float) -> bool:
+        """Mark token id as used, return False if it had already been used"""
+
+    @abstractmethod
+    async def revoke_family(self, family: str, expires_at: float) -> None:
+        """Reject every token of the family until expires_at"""
+
+    @abstractmethod
+    async def is_family_revoked(self, family: str) -> bool: ...
+
+
+class InMemoryRevocationStore(RevocationStore):
+    """Per-process store keeping 16-byte token ids with their expiry"""
+
+    def __init__(self, purge_interval: float = 60):
+        self.purge_interval = purge_interval
+        self._used: dict[bytes, float] = {}
+        self._revoked: dict[bytes, float] = {}
+        self._purged_at = time.time()
+
+    async def mark_used(self, jti: str, expires_at: float) -> bool:
+        self._purge()
+        key = uuid.UUID(hex=jti).bytes
+        if key in self._used:
+            return False
+        self._used[key] = expires_at
+        return True
+
+    async def revoke_family(self, family: str, expires_at: float) -> None:
+        key = uuid.UUID(hex=family).bytes
+        self._revoked[key] = max(expires_at, self._revoked.get(key, 0))
+
+    async def is_family_revoked(self, family: str) -> bool:
+        self._purge()
+        return uuid.UUID(hex=family).bytes in self._revoked
+
+    def _purge(self) -> None:
+        now = time.time()
+        if now - self._purged_at < self.purge_interval:
+            return
+        self._purged_at = now
+
+        for entries in (self._used, self._revoked):
+            expired = [key for key, expires_at in entries.items() if expires_at <= now]
+            for key in expired:
+                del entries[key]
+
+
+revocation_store: RevocationStore = InMemoryRevocationStore()
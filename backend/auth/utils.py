@@ -1,16 +1,26 @@
 import hashlib
 import hmac
+import time
 from datetime import datetime, timedelta
 from typing import Any
 
 import jwt
 
+from backend.auth.keys import keyring
+from backend.core.cache import TTLCache
 from backend.core.config import settings
 
+token_cache: TTLCache[bytes, dict[str, Any]] = TTLCache(
+    maxsize=settings.auth_jwt.token_cache_size,
+    ttl=settings.auth_jwt.token_cache_ttl_seconds,
+)
+# Claims verified with a retired key must not outlive a key rotation
+keyring.on_reload.append(token_cache.clear)
+
 
 async def encode_jwt(
     payload: dict[str, Any],
-    private_key: str = settings.auth_jwt.private_key_path.read_text(),
+    private_key: Any = None,
     algorithm: str = settings.auth_jwt.algorithm,
     expire_minutes: int = settings.auth_jwt.access_token_expire_minutes,
     expire_timedelta: timedelta | None = None,
@@ -24,20 +34,57 @@ async def encode_jwt(
         expire = now + timedelta(minutes=expire_minutes)
 
     to_encode.update(exp=expire, iat=now)
-    encoded = jwt.encode(payload=to_encode, key=private_key, algorithm=algorithm)
+
+    headers = None
+    if private_key is None:
+        kid, private_key = keyring.signing_key()
+        headers = {"kid": kid}
+
+    encoded = jwt.encode(
+        payload=to_encode, key=private_key, algorithm=algorithm, headers=headers
+    )
 
     return encoded
 
 
 async def decode_jwt(
     token: str | bytes,
-    public_key: str = settings.auth_jwt.public_key_path.read_text(),
+    public_key: Any = None,
     algorithm: str = settings.auth_jwt.algorithm,
 ):
+    if public_key is None:
+        kid = jwt.get_unverified_header(token).get("kid")
+        public_key = keyring.verification_key(kid)
+        if public_key is None:
+            raise jwt.InvalidKeyError(f"Unknown key id: {kid}")
+
     decoded = jwt.decode(jwt=token, key=public_key, algorithms=[algorithm])
     return decoded
 
 
+async def decode_jwt_cached(token: str) -> dict[str, Any]:
+    """Decode JWT, reusing claims of tokens that were already verified
+
+    Entries are keyed by token digest and never outlive the token's exp claim
+    """
+    keyring.refresh()
+
+    key = hashlib.sha256(token.encode()).digest()
+    cached = token_cache.get(key)
+    if cached is not None:
+        return dict(cached)
+
+    decoded = await decode_jwt(token)
+
+    exp = decoded.get("exp")
+    if exp is not None:
+        token_cache.set(key, decoded, ttl=exp - time.time())
+    else:
+        token_cache.set(key, decoded)
+
+    return dict(decoded)
+
+
 def validate_telegram_auth(auth_data: dict[str, str], bot_token: str) -> bool:
     """Validate Telegram widget authentication data"""
     if not bot_token:
@@ -0,0 +1,136 @@
+import logging
+import time
+import uuid
+from collections import deque
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from typing import Any, Literal
+
+from backend.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+ChangeOp = Literal["upsert", "delete"]
+
+
+@dataclass(frozen=True, slots=True)
+class Change:
+    seq: int
+    resource: str
+    op: ChangeOp
+    key: int
+    data: dict[str, Any] | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class SyncToken:
+    seq: int
+    # Unix time of the full resync this token descends from
+    snapshot_at: int
+    # Table fingerprint when the token was issued
+    fingerprint: str
+
+
+class ChangeFeed:
+    """Bounded log of writes made through this process, ordered by sequence number
+
+    Sync tokens are "<epoch>.<seq>.<snapshot_at>.<fingerprint>". The epoch
+    changes on every start, so a token issued by another process or before a
+    restart is detected and the client falls back to a full resync, as it
+    does when its position has already been evicted from the log.
+
+    Writes made by other workers or outside the API never enter the log. The
+    table fingerprint catches them when the log has nothing newer for the
+    resource; when it does, they are picked up by the full resync forced
+    max_age seconds after the previous one.
+    """
+
+    def __init__(self, maxlen: int, max_age: int):
+        self.max_age = max_age
+        self.epoch = uuid.uuid4().hex[:12]
+        self.seq = 0
+        self._log: deque[Change] = deque(maxlen=maxlen)
+        self._subscribers: list[Callable[[Change], None]] = []
+
+    def subscribe(self, callback: Callable[[Change], None]) -> None:
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[Change], None]) -> None:
+        self._subscribers.remove(callback)
+
+    def record(
+        self,
+        resource: str,
+        op: ChangeOp,
+        keys: Iterable[int],
+        data: dict[str, Any] | None = None,
+    ) -> None:
+        """Append one change per key and notify subscribers"""
+        for key in keys:
+            self.seq += 1
+            change = Change(seq=self.seq, resource=resource, op=op, key=key, data=data)
+            self._log.append(change)
+            for callback in list(self._subscribers):
+                # The write is already committed, a subscriber must not fail it
+                try:
+                    callback(change)
+                except Exception:
+                    logger.exception("Change subscriber %r failed", callback)
+
+    def token(self, fingerprint: str, snapshot_at: int | None = None) -> str:
+        snapshot_at = int(time.time()) if snapshot_at is None else snapshot_at
+        return f"{self.epoch}.{self.seq}.{snapshot_at}.{fingerprint}"
+
+    def parse_token(self, token: str) -> SyncToken | None:
+        """Parsed token, None if expired or not issued by this feed"""
+        parts = token.split(".")
+        if len(parts) != 4:
+            return None
+        epoch, seq, snapshot_at, fingerprint = parts
+        if (
+            epoch != self.epoch
+            or not seq.isdigit()
+            or int(seq) > self.seq
+            or not snapshot_at.isdigit()
+            or time.time() - int(snapshot_at) > self.max_age
+        ):
+            return None
+        return SyncToken(int(seq), int(snapshot_at), fingerprint)
+
+    def delta(
+        self, resource: str, token: str | None, fingerprint: str
+    ) -> tuple[dict[int, ChangeOp] | None, str]:
+        """Changes of resource since token and the next token, None for a full resync
+
+        fingerprint is the current one of the resource's table. Take it, and
+        call this, before reading rows, so writes racing with the request are
+        sent again on the next sync.
+        """
+        parsed = self.parse_token(token) if token else None
+        if parsed is None:
+            return None, self.token(fingerprint)
+        changes = self.since(resource, parsed.seq)
+        if changes is None or (not changes and parsed.fingerprint != fingerprint):
+            return None, self.token(fingerprint)
+        return changes, self.token(fingerprint, parsed.snapshot_at)
+
+    def since(self, resource: str, seq: int) -> dict[int, ChangeOp] | None:
+        """Latest operation per key of resource after seq
+
+        Returns None when changes after seq were already evicted
+        """
+        if self._log and self._log[0].seq > seq + 1:
+            return None
+        if not self._log and seq < self.seq:
+            return None
+
+        latest: dict[int, ChangeOp] = {}
+        for change in self._log:
+            if change.seq > seq and change.resource == resource:
+                latest[change.key] = change.op
+        return latest
+
+
+change_feed = ChangeFeed(
+    maxlen=settings.CHANGE_FEED_SIZE, max_age=settings.SYNC_TOKEN_MAX_AGE_SECONDS
+)
@@ -18,11 +18,26 @@ def parse_cors(v: Any) -> list[str] | str:
 class AuthJWT(BaseModel):
     private_key_path: Path = BASE_DIR / "certs" / "jwt_private.pem"
     public_key_path: Path = BASE_DIR / "certs" / "jwt_public.pem"
+    # Previous public keys still accepted for verification during rotation
+    extra_public_key_paths: list[Path] = []
+    key_reload_interval_seconds: int = 30
     algorithm: str = "EdDSA"
 
     access_token_expire_minutes: int = 60 * 24  # 24 hours
+    # Authorize identity-only routes from token claims without DB access.
+    # Revocation then relies on the shorter access token lifetime below
+    stateless: bool = False
+    stateless_access_token_expire_minutes: int = 15
     refresh_token_expire_minutes: int = 60 * 24 * 7  # 7 days
 
+    # Verified token claims cache
+    token_cache_size: int = 4096
+    token_cache_ttl_seconds: int = 300
+
+    # Authenticated employee cache, invalidated by employee writes
+    identity_cache_size: int = 1024
+    identity_cache_ttl_seconds: int = 60
+
 
 class Settings(BaseSettings):
     PROJECT_NAME: str = "FastAPI App"
@@ -45,6 +60,64 @@ class Settings(BaseSettings):
     # Telegram Bot Token for authentication validation
     TELEGRAM_BOT_TOKEN: str = ""
 
+    # Writes remembered for delta sync, older sync tokens get a full resync
+    CHANGE_FEED_SIZE: int = 10000
+    # Delta sync forces a full resync this long after the previous one, bounding
+    # how long writes made outside this process can go unnoticed
+    SYNC_TOKEN_MAX_AGE_SECONDS: int = 300
+
+    # Serialized bodies of list routes, dropped on writes through the API
+    RESPONSE_CACHE_SIZE: int = 512
+    RESPONSE_CACHE_TTL_SECONDS: int = 30
+    RESPONSE_CACHE_MAX_BODY_BYTES: int = 2_000_000
+
+    # Server-Sent Events: per-client queue length, client limit, keepalive period
+    EVENTS_QUEUE_SIZE: int = 256
+    EVENTS_MAX_SUBSCRIBERS: int = 1000
+    EVENTS_KEEPALIVE_SECONDS: int = 15
+
+    # Keyset pagination of list endpoints
+    PAGE_SIZE_DEFAULT: int = 100
+    PAGE_SIZE_MAX: int = 1000
+    # Rows fetched per server-side cursor round trip in exports
+    EXPORT_BATCH_SIZE: int = 500
+    # Bulk imports: rows per request and rows per INSERT/UPDATE batch
+    BULK_MAX_ROWS: int = 5000
+    BULK_BATCH_SIZE: int = 500
+    EMPLOYEES_BATCH_MAX_IDS: int = 1000
+
+    # Employee search: full index reload period, minimal fuzzy match score, max hits
+    EMPLOYEE_INDEX_RELOAD_SECONDS: int = 600
+    EMPLOYEE_SEARCH_MIN_SCORE: float = 0.5
+    EMPLOYEE_SEARCH_MAX_LIMIT: int = 50
+    # Rebuild period of the org chart, catches head changes made outside the API
+    ORG_CHART_RELOAD_SECONDS: int = 600
+    # Full reload period of the achievement eligibility index
+    ACHIEVEMENT_INDEX_RELOAD_SECONDS: int = 600
+    # Award jobs run this long after a day, week or month ends. Enable only
+    # once the achievement_awards migration is applied and a KPI source is set
+    AWARDS_SCHEDULER_ENABLED: bool = False
+    AWARDS_RUN_OFFSET_MINUTES: int = 30
+    # Run jobs for the last complete periods on startup, missed while down
+    AWARDS_CATCH_UP: bool = True
+    # KPI data of award jobs, "package.module:function" implementing KPISource
+    AWARDS_KPI_SOURCE: str = ""
+    # Full rebuild period of the points leaderboard, picks up other workers' awards
+    LEADERBOARD_REBUILD_SECONDS: int = 900
+    LEADERBOARD_MAX_LIMIT: int = 100
+
+    # Statuses of exchanges still available on the marketplace
+    EXCHANGE_OPEN_STATUSES: list[str] = ["active"]
+    # Upper bound of a shift length, turns overlap search into a start range scan
+    EXCHANGE_MAX_DURATION_HOURS: int = 24
+    EXCHANGE_OVERLAP_MAX_WINDOWS: int = 2000
+    # Full reload of the matching book, picks up exchanges created outside the API
+    EXCHANGE_BOOK_RELOAD_SECONDS: int = 5 * 60
+
+    # Exchange analytics over periods that already ended
+    EXCHANGE_STATS_CACHE_SIZE: int = 256
+    EXCHANGE_STATS_CACHE_TTL_SECONDS: int = 60 * 60
+
     API_HOST: str = "0.0.0.0"
     API_PORT: int = 8000
 
@@ -0,0 +1,114 @@
+import asyncio
+import json
+from collections.abc import AsyncIterator
+from dataclasses import asdict
+
+from backend.core.changes import Change, change_feed
+from backend.core.config import settings
+
+
+class Subscriber:
+    def __init__(self, resources: set[str] | None, keys: set[int] | None, size: int):
+        self.resources = resources
+        self.keys = keys
+        self.queue: asyncio.Queue[Change | None] = asyncio.Queue(maxsize=size)
+        self.dropped = False
+
+    def accepts(self, change: Change) -> bool:
+        return (self.resources is None or change.resource in self.resources) and (
+            self.keys is None or change.key in self.keys
+        )
+
+
+class EventBroadcaster:
+    """Fans change feed entries out to connected clients
+
+    Each subscriber has a bounded queue. A client that falls a full queue
+    behind is dropped instead of buffering without limit, and is expected to
+    reconnect and catch up through the sync endpoints.
+    """
+
+    def __init__(self, queue_size: int, max_subscribers: int):
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self.dropped = 0
+        self._subscribers: set[Subscriber] = set()
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    @property
+    def full(self) -> bool:
+        return len(self._subscribers) >= self.max_subscribers
+
+    def subscribe(
+        self, resources: set[str] | None = None, keys: set[int] | None = None
+    ) -> Subscriber | None:
+        """Register a subscriber, None if the subscriber limit is reached"""
+        if self.full:
+            return None
+        subscriber = Subscriber(resources, keys, self.queue_size)
+        self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        self._subscribers.discard(subscriber)
+
+    def publish(self, change: Change) -> None:
+        for subscriber in list(self._subscribers):
+            if not subscriber.accepts(change):
+                continue
+            try:
+                subscriber.queue.put_nowait(change)
+            except asyncio.QueueFull:
+                self._drop(subscriber)
+
+    def _drop(self, subscriber: Subscriber) -> None:
+        self.unsubscribe(subscriber)
+        self.dropped += 1
+        subscriber.dropped = True
+        # Free the queue so the stream wakes up and ends right away
+        while not subscriber.queue.empty():
+            subscriber.queue.get_nowait()
+        subscriber.queue.put_nowait(None)
+
+    async def stream(
+        self,
+        keepalive: float,
+        resources: set[str] | None = None,
+        keys: set[int] | None = None,
+    ) -> AsyncIterator[str]:
+        """Server-Sent Events for a new subscriber until it disconnects or is dropped
+
+        The subscriber is registered on the first iteration, so a client that
+        disconnects before streaming starts never holds a slot.
+        """
+        subscriber = self.subscribe(resources, keys)
+        if subscriber is None:
+            # Lost the last slot to a concurrent request
+            yield "event: dropped\ndata: {}\n\n"
+            return
+        try:
+            yield f"retry: {int(keepalive * 1000)}\n\n"
+            while True:
+                try:
+                    change = await asyncio.wait_for(subscriber.queue.get(), keepalive)
+                except TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+
+                if change is None:
+                    yield "event: dropped\ndata: {}\n\n"
+                    return
+
+                data = json.dumps(asdict(change), ensure_ascii=False)
+                yield f"id: {change.seq}\nevent: {change.resource}\ndata: {data}\n\n"
+        finally:
+            self.unsubscribe(subscriber)
+
+
+broadcaster = EventBroadcaster(
+    queue_size=settings.EVENTS_QUEUE_SIZE,
+    max_subscribers=settings.EVENTS_MAX_SUBSCRIBERS,
+)
+change_feed.subscribe(broadcaster.publish)
@@ -0,0 +1,49 @@
+import base64
+import binascii
+import json
+from typing import Any
+
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+
+
+def encode_cursor(values: dict[str, Any]) -> str:
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> dict[str, Any]:
+    """Decode opaque cursor, raise ValueError if it was not produced by encode_cursor"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+    if not isinstance(values, dict):
+        raise ValueError("Invalid cursor")
+    return values
+
+
+async def keyset_page(
+    session: AsyncSession,
+    stmt: Select,
+    id_column: InstrumentedAttribute,
+    limit: int,
+    after_id: int | None = None,
+) -> tuple[list[Any], str | None]:
+    """Fetch one page ordered by id_column, seeking past after_id instead of OFFSET
+
+    Returns rows and the cursor of the next page (None on the last page)
+    """
+    if after_id is not None:
+        stmt = stmt.where(id_column > after_id)
+    stmt = stmt.order_by(id_column).limit(limit + 1)
+
+    rows = list((await session.scalars(stmt)).all())
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    return rows, encode_cursor({"id": getattr(rows[-1], id_column.key)})
@@ -0,0 +1,125 @@
+import time
+from collections.abc import Iterable
+
+from backend.core.changes import Change, change_feed
+from backend.core.config import settings
+from backend.employees.search import normalize
+from backend.schemas.employee import EmployeeDTO
+
+
+def name_key(fullname: str) -> str:
+    return " ".join(normalize(fullname))
+
+
+class OrgChart:
+    """Adjacency index of the org structure built from the free-text head field
+
+    head is resolved to the employee with the same full name, ignoring case,
+    punctuation and ё. When several employees share a name the one with the
+    lowest id is taken. Heads that match nobody make their subordinates
+    roots. Walks guard against cycles left by inconsistent data.
+    """
+
+    def __init__(self, employees: Iterable[EmployeeDTO]):
+        self.employees = {employee.id: employee for employee in employees}
+        by_name: dict[str, int] = {}
+        for employee_id in sorted(self.employees):
+            by_name.setdefault(
+                name_key(self.employees[employee_id].fullname), employee_id
+            )
+
+        self.head_of: dict[int, int] = {}
+        self.children: dict[int, list[int]] = {}
+        for employee in self.employees.values():
+            head_id = by_name.get(name_key(employee.head)) if employee.head else None
+            if head_id is not None and head_id != employee.id:
+                self.head_of[employee.id] = head_id
+                self.children.setdefault(head_id, []).append(employee.id)
+        for subordinates in self.children.values():
+            subordinates.sort(
+                key=lambda employee_id: self.employees[employee_id].fullname
+            )
+
+        self.team_sizes = self._count_teams()
+
+    def __contains__(self, employee_id: int) -> bool:
+        return employee_id in self.employees
+
+    def chain(self, employee_id: int) -> list[int]:
+        """Heads of employee from the direct one up to the top"""
+        chain: list[int] = []
+        seen = {employee_id}
+        head_id = self.head_of.get(employee_id)
+        while head_id is not None and head_id not in seen:
+            chain.append(head_id)
+            seen.add(head_id)
+            head_id = self.head_of.get(head_id)
+        return chain
+
+    def subtree(
+        self, employee_id: int, max_depth: int | None = None
+    ) -> list[tuple[int, int]]:
+        """(id, depth) of everyone under employee, breadth first"""
+        found: list[tuple[int, int]] = []
+        seen = {employee_id}
+        level, depth = [employee_id], 0
+        while level and (max_depth is None or depth < max_depth):
+            depth += 1
+            next_level = []
+            for head_id in level:
+                for child_id in self.children.get(head_id, ()):
+                    if child_id not in seen:
+                        seen.add(child_id)
+                        found.append((child_id, depth))
+                        next_level.append(child_id)
+            level = next_level
+        return found
+
+    def _count_teams(self) -> dict[int, int]:
+        """Number of direct and indirect subordinates of every head"""
+        order = [
+            employee_id
+            for employee_id in self.employees
+            if employee_id not in self.head_of
+        ]
+        for employee_id in order:
+            order.extend(self.children.get(employee_id, ()))
+
+        sizes: dict[int, int] = {}
+        for employee_id in reversed(order):
+            children = self.children.get(employee_id, ())
+            if children:
+                sizes[employee_id] = sum(1 + sizes.get(child, 0) for child in children)
+
+        # Employees on a head cycle are unreachable from the roots
+        for employee_id in self.children:
+            if employee_id not in sizes:
+                sizes[employee_id] = len(self.subtree(employee_id))
+        return sizes
+
+
+class OrgChartCache:
+    """Holds the current OrgChart, dropped on employee writes and rebuilt on demand"""
+
+    def __init__(self, reload_interval: float):
+        self.reload_interval = reload_interval
+        self._chart: OrgChart | None = None
+        self._built_at = float("-inf")
+
+    def get(self) -> OrgChart | None:
+        if time.monotonic() - self._built_at >= self.reload_interval:
+            self._chart = None
+        return self._chart
+
+    def set(self, chart: OrgChart) -> None:
+        self._chart = chart
+        self._built_at = time.monotonic()
+
+    def apply(self, change: Change) -> None:
+        """Change feed subscriber invalidating the chart on employee writes"""
+        if change.resource == "employee":
+            self._chart = None
+
+
+org_chart_cache = OrgChartCache(reload_interval=settings.ORG_CHART_RELOAD_SECONDS)
+change_feed.subscribe(org_chart_cache.apply)
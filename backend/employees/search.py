@@ -0,0 +1,188 @@
+import heapq
+import math
+import re
+import time
+from bisect import bisect_left, insort
+from collections import Counter
+from collections.abc import Iterable
+
+from backend.core.changes import Change, change_feed
+from backend.core.config import settings
+from backend.schemas.employee import EmployeeDTO
+
+_NON_WORD = re.compile(r"[^\w]+")
+
+
+def normalize(text: str) -> list[str]:
+    """Lowercased words with ё folded into е"""
+    return _NON_WORD.sub(" ", text.lower().replace("ё", "е")).split()
+
+
+def trigrams(word: str, prefix: bool = False) -> set[str]:
+    """Trigrams of a word padded at the start, and at the end unless it is a prefix"""
+    padded = f"  {word}" if prefix else f"  {word} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class EmployeeSearchIndex:
+    """Prefix and trigram index over employee full names and usernames
+
+    Prefix matches come from bisecting a sorted word list. When they do not
+    fill the requested number of hits, typo-tolerant matches are added from
+    trigram postings, scored by the share of query trigrams a name contains.
+    Writes made through the API update the index from the change feed;
+    changes without a payload (bulk writes) and rows written elsewhere are
+    picked up by refreshing dirty ids and by the periodic full reload.
+    """
+
+    def __init__(self, reload_interval: float, min_score: float):
+        self.reload_interval = reload_interval
+        self.min_score = min_score
+        self.dirty: set[int] = set()
+        self._employees: dict[int, EmployeeDTO] = {}
+        self._words: dict[int, list[str]] = {}
+        self._rank: dict[int, tuple[int, str]] = {}
+        self._sorted_words: list[tuple[str, int]] = []
+        self._grams: dict[str, set[int]] = {}
+        self._loaded_at = float("-inf")
+
+    def __len__(self) -> int:
+        return len(self._employees)
+
+    def is_stale(self) -> bool:
+        return time.monotonic() - self._loaded_at >= self.reload_interval
+
+    def load(self, employees: Iterable[EmployeeDTO]) -> None:
+        """Replace the whole index, e.g. with a fresh read from the database"""
+        self._employees = {}
+        self._words = {}
+        self._rank = {}
+        self._sorted_words = []
+        self._grams = {}
+        for employee in employees:
+            self._sorted_words.extend(self._add(employee))
+        self._sorted_words.sort()
+        self.dirty.clear()
+        self._loaded_at = time.monotonic()
+
+    def upsert(self, employee: EmployeeDTO) -> None:
+        self.remove(employee.id)
+        for item in self._add(employee):
+            insort(self._sorted_words, item)
+
+    def remove(self, employee_id: int) -> None:
+        if self._employees.pop(employee_id, None) is None:
+            return
+        del self._rank[employee_id]
+        for word in self._words.pop(employee_id):
+            i = bisect_left(self._sorted_words, (word, employee_id))
+            if i < len(self._sorted_words) and self._sorted_words[i] == (
+                word,
+                employee_id,
+            ):
+                del self._sorted_words[i]
+            for gram in trigrams(word):
+                postings = self._grams.get(gram)
+                if postings is not None:
+                    postings.discard(employee_id)
+                    if not postings:
+                        del self._grams[gram]
+
+    def apply(self, change: Change) -> None:
+        """Change feed subscriber keeping the index in step with employee writes"""
+        if change.resource != "employee":
+            return
+        if change.op == "delete":
+            self.remove(change.key)
+            self.dirty.discard(change.key)
+        elif change.data is not None:
+            self.upsert(EmployeeDTO.model_validate(change.data))
+            self.dirty.discard(change.key)
+        else:
+            self.dirty.add(change.key)
+
+    def _add(self, employee: EmployeeDTO) -> list[tuple[str, int]]:
+        words = list(
+            dict.fromkeys(
+                normalize(employee.fullname) + normalize(employee.username or "")
+            )
+        )
+        self._employees[employee.id] = employee
+        self._words[employee.id] = words
+        self._rank[employee.id] = (len(employee.fullname), employee.fullname)
+        for word in words:
+            for gram in trigrams(word):
+                self._grams.setdefault(gram, set()).add(employee.id)
+        return [(word, employee.id) for word in words]
+
+    def _prefixed(self, word: str) -> set[int]:
+        lo = bisect_left(self._sorted_words, (word,))
+        hi = bisect_left(self._sorted_words, (word + "\U0010ffff",), lo)
+        return {employee_id for _, employee_id in self._sorted_words[lo:hi]}
+
+    def search(
+        self, query: str, limit: int = 10, division: str | None = None
+    ) -> list[tuple[EmployeeDTO, float]]:
+        """Top employees for query, prefix matches first, then fuzzy ones"""
+        words = normalize(query)
+        if not words:
+            return []
+
+        def allowed(employee_id: int) -> bool:
+            return division is None or self._employees[employee_id].division == division
+
+        prefixed = self._prefixed(words[0])
+        for word in words[1:]:
+            if not prefixed:
+                break
+            prefixed &= self._prefixed(word)
+        hits = heapq.nsmallest(
+            limit, filter(allowed, prefixed), key=self._rank.__getitem__
+        )
+        ranked = [(self._employees[employee_id], 1.0) for employee_id in hits]
+        if len(ranked) >= limit:
+            return ranked
+
+        # The last word may still be being typed, so it is matched as a prefix
+        query_grams = set().union(
+            *(trigrams(word) for word in words[:-1]),
+            trigrams(words[-1], prefix=True),
+        )
+        # A name reaching min_count shares at least one of the rarest
+        # len - min_count + 1 trigrams, so only those seed the candidates and
+        # the frequent ones are checked per candidate
+        postings = sorted(
+            (self._grams.get(gram, set()) for gram in query_grams), key=len
+        )
+        min_count = math.ceil(self.min_score * len(postings))
+        split = len(postings) - min_count + 1
+        shared: Counter[int] = Counter()
+        for posting in postings[:split]:
+            shared.update(posting)
+        for posting in postings[split:]:
+            for employee_id in shared:
+                if employee_id in posting:
+                    shared[employee_id] += 1
+
+        fuzzy = heapq.nsmallest(
+            limit - len(ranked),
+            (
+                (-count, employee_id)
+                for employee_id, count in shared.items()
+                if count >= min_count
+                and employee_id not in prefixed
+                and allowed(employee_id)
+            ),
+        )
+        ranked.extend(
+            (self._employees[employee_id], round(-count / len(query_grams), 3))
+            for count, employee_id in fuzzy
+        )
+        return ranked
+
+
+employee_index = EmployeeSearchIndex(
+    reload_interval=settings.EMPLOYEE_INDEX_RELOAD_SECONDS,
+    min_score=settings.EMPLOYEE_SEARCH_MIN_SCORE,
+)
+change_feed.subscribe(employee_index.apply)
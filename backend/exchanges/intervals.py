@@ -0,0 +1,33 @@
+from bisect import bisect_left
+from collections.abc import Iterable
+from datetime import datetime, timedelta
+from typing import Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class IntervalIndex(Generic[T]):
+    """Half-open intervals sorted by start, searched with bisect
+
+    An interval overlapping [start, end) must begin before end and, since no
+    interval is longer than the longest one indexed, not earlier than
+    start - max_length. Both bounds are binary searches, so a lookup costs
+    O(log n + k) where k is the number of intervals in that start range.
+    """
+
+    def __init__(self, intervals: Iterable[tuple[datetime, datetime, T]]):
+        ordered = sorted(intervals, key=lambda interval: interval[0])
+        self._starts = [start for start, _, _ in ordered]
+        self._ends = [end for _, end, _ in ordered]
+        self._items = [item for _, _, item in ordered]
+        self._max_length = max(
+            (end - start for start, end, _ in ordered), default=timedelta(0)
+        )
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def overlapping(self, start: datetime, end: datetime) -> list[T]:
+        lo = bisect_left(self._starts, start - self._max_length)
+        hi = bisect_left(self._starts, end)
+        return [self._items[i] for i in range(lo, hi) if self._ends[i] > start]
@@ -0,0 +1,125 @@
+import time
+from bisect import bisect_left, insort
+from collections.abc import Iterable
+from datetime import timedelta
+
+from backend.core.config import settings
+from backend.schemas.exchanges import ExchangeDTO
+
+# Sell offers are matched with buy requests and vice versa
+OPPOSITE_INTENTS = {"sell": "buy", "buy": "sell"}
+
+
+class ExchangeBook:
+    """In-memory book of open exchanges used to match sell offers with buy requests
+
+    Exchanges are kept per owner_intent in lists sorted by (start_time, id).
+    Writes done through the API update the book in place; exchanges created
+    elsewhere (e.g. by the bot) show up on the next full reload.
+    """
+
+    def __init__(self, reload_interval: float):
+        self.reload_interval = reload_interval
+        self._exchanges: dict[int, ExchangeDTO] = {}
+        self._by_intent: dict[str, list[tuple]] = {}
+        self._banned: set[int] = set()
+        self._max_length = timedelta(0)
+        self._loaded_at = float("-inf")
+
+    def __len__(self) -> int:
+        return len(self._exchanges)
+
+    def is_stale(self) -> bool:
+        return time.monotonic() - self._loaded_at >= self.reload_interval
+
+    def load(self, exchanges: Iterable[ExchangeDTO], banned: Iterable[int]) -> None:
+        """Replace the whole book, e.g. with a fresh read from the database"""
+        self._exchanges = {}
+        self._by_intent = {}
+        self._max_length = timedelta(0)
+        for exchange in sorted(exchanges, key=lambda exc: (exc.start_time, exc.id)):
+            self._exchanges[exchange.id] = exchange
+            self._by_intent.setdefault(exchange.owner_intent, []).append(
+                (exchange.start_time, exchange.id)
+            )
+            self._max_length = max(
+                self._max_length, exchange.end_time - exchange.start_time
+            )
+        self._banned = set(banned)
+        self._loaded_at = time.monotonic()
+
+    def upsert(self, exchange: ExchangeDTO) -> None:
+        self.remove(exchange.id)
+        self._exchanges[exchange.id] = exchange
+        insort(
+            self._by_intent.setdefault(exchange.owner_intent, []),
+            (exchange.start_time, exchange.id),
+        )
+        self._max_length = max(
+            self._max_length, exchange.end_time - exchange.start_time
+        )
+
+    def remove(self, exchange_id: int) -> None:
+        exchange = self._exchanges.pop(exchange_id, None)
+        if exchange is None:
+            return
+        keys = self._by_intent[exchange.owner_intent]
+        i = bisect_left(keys, (exchange.start_time, exchange.id))
+        if i < len(keys) and keys[i] == (exchange.start_time, exchange.id):
+            del keys[i]
+
+    def set_banned(self, user_id: int, banned: bool) -> None:
+        if banned:
+            self._banned.add(user_id)
+        else:
+            self._banned.discard(user_id)
+
+    def get(self, exchange_id: int) -> ExchangeDTO | None:
+        return self._exchanges.get(exchange_id)
+
+    def match(
+        self,
+        exchange: ExchangeDTO,
+        price_min: int | None = None,
+        price_max: int | None = None,
+        limit: int = 20,
+    ) -> list[tuple[ExchangeDTO, float]]:
+        """Find counter-exchanges overlapping exchange in time
+
+        Private exchanges, own exchanges and exchanges of employees banned
+        from the marketplace are skipped. Results are ranked by the share of
+        the exchange covered by the candidate, then by price difference
+        """
+        intent = OPPOSITE_INTENTS.get(exchange.owner_intent)
+        if intent is None or exchange.owner_id in self._banned:
+            return []
+
+        keys = self._by_intent.get(intent, [])
+        lo = bisect_left(keys, (exchange.start_time - self._max_length,))
+        hi = bisect_left(keys, (exchange.end_time,))
+        duration = (exchange.end_time - exchange.start_time).total_seconds() or 1
+
+        ranked = []
+        for _, candidate_id in keys[lo:hi]:
+            candidate = self._exchanges[candidate_id]
+            if (
+                candidate.end_time <= exchange.start_time
+                or candidate.is_private
+                or candidate.owner_id == exchange.owner_id
+                or candidate.owner_id in self._banned
+                or (price_min is not None and candidate.price < price_min)
+                or (price_max is not None and candidate.price > price_max)
+            ):
+                continue
+
+            overlap = min(candidate.end_time, exchange.end_time) - max(
+                candidate.start_time, exchange.start_time
+            )
+            score = overlap.total_seconds() / duration
+            ranked.append((-score, abs(candidate.price - exchange.price), candidate))
+
+        ranked.sort(key=lambda item: (item[0], item[1], item[2].start_time))
+        return [(candidate, -score) for score, _, candidate in ranked[:limit]]
+
+
+exchange_book = ExchangeBook(reload_interval=settings.EXCHANGE_BOOK_RELOAD_SECONDS)
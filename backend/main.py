@@ -1,9 +1,14 @@
+from contextlib import asynccontextmanager
+
 import uvicorn
 from fastapi import FastAPI
 from fastapi.routing import APIRoute
 from starlette.middleware.cors import CORSMiddleware
 
+from backend.achievements.scheduler import award_scheduler, load_kpi_source
+from backend.api.deps import session_pool
 from backend.api.main import api_router
+from backend.api.routes.employees import get_employee_index
 from backend.core.config import settings
 
 
@@ -11,8 +16,23 @@ def custom_generate_unique_id(route: APIRoute) -> str:
     return f"{route.tags}-{route.name}"
 
 
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    # Build the employee search index up front instead of on the first search
+    async with session_pool() as session:
+        await get_employee_index(session)
+
+    if settings.AWARDS_SCHEDULER_ENABLED:
+        if settings.AWARDS_KPI_SOURCE:
+            award_scheduler.kpi_source = load_kpi_source(settings.AWARDS_KPI_SOURCE)
+        award_scheduler.start(catch_up=settings.AWARDS_CATCH_UP)
+    yield
+    await award_scheduler.stop()
+
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
+    lifespan=lifespan,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     generate_unique_id_function=custom_generate_unique_id,
 )
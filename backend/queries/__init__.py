@@ -0,0 +1 @@
+# SQL queries not covered by stp_database repositories
@@ -0,0 +1,146 @@
+from collections.abc import Sequence
+from datetime import datetime
+
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    DateTime,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    UniqueConstraint,
+    func,
+    insert,
+    inspect,
+    select,
+    tuple_,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.dml import Insert
+from stp_database.models.STP import Achievement
+
+metadata = MetaData()
+
+# One row per achievement earned by an employee in a period, e.g. "2026-09".
+# The table is created by a stp-database migration, see README, never from here.
+achievement_awards = Table(
+    "achievement_awards",
+    metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("user_id", BigInteger, nullable=False),
+    Column("achievement_id", Integer, nullable=False),
+    Column("period_key", String(16), nullable=False),
+    Column("reward", Integer, nullable=False),
+    Column("awarded_at", DateTime, nullable=False),
+    UniqueConstraint("user_id", "achievement_id", "period_key", name="uq_award"),
+)
+
+
+async def insert_awards(
+    session: AsyncSession,
+    awards: Sequence[tuple[int, int, int]],
+    period_key: str,
+    batch_size: int,
+) -> list[tuple[int, int, int]]:
+    """Insert (user_id, achievement_id, reward) awards of period_key in batches
+
+    Awards already present for the period are skipped, so repeated runs are
+    safe; INSERT IGNORE on the unique key covers concurrent writers. Returns
+    only the awards this call actually inserted.
+    """
+    now = datetime.now()
+
+    def insert_rows(rows: Sequence[tuple[int, int, int]]) -> Insert:
+        return (
+            insert(achievement_awards)
+            .prefix_with("IGNORE", dialect="mysql")
+            .values(
+                [
+                    {
+                        "user_id": user_id,
+                        "achievement_id": achievement_id,
+                        "period_key": period_key,
+                        "reward": reward,
+                        "awarded_at": now,
+                    }
+                    for user_id, achievement_id, reward in rows
+                ]
+            )
+        )
+
+    inserted: list[tuple[int, int, int]] = []
+    for start in range(0, len(awards), batch_size):
+        batch = awards[start : start + batch_size]
+        existing = set(
+            (
+                await session.execute(
+                    select(
+                        achievement_awards.c.user_id,
+                        achievement_awards.c.achievement_id,
+                    ).where(
+                        achievement_awards.c.period_key == period_key,
+                        tuple_(
+                            achievement_awards.c.user_id,
+                            achievement_awards.c.achievement_id,
+                        ).in_(
+                            [
+                                (user_id, achievement_id)
+                                for user_id, achievement_id, _ in batch
+                            ]
+                        ),
+                    )
+                )
+            ).tuples()
+        )
+        new = [award for award in batch if award[:2] not in existing]
+        if not new:
+            continue
+
+        savepoint = await session.begin_nested()
+        result = await session.execute(insert_rows(new))
+        if result.rowcount == len(new):
+            await savepoint.commit()
+            inserted.extend(new)
+            continue
+        # Another writer got some of the rows in since the select above. Redo
+        # the batch row by row to learn which ones were inserted here
+        await savepoint.rollback()
+        for award in new:
+            result = await session.execute(insert_rows([award]))
+            if result.rowcount == 1:
+                inserted.append(award)
+    await session.commit()
+    return inserted
+
+
+async def get_award_totals(session: AsyncSession) -> list[tuple[str, int, str, int]]:
+    """Points per (achievement division, user_id, period_key)
+
+    Empty until the achievement_awards migration is applied.
+    """
+    exists = await session.run_sync(
+        lambda sync_session: inspect(sync_session.connection()).has_table(
+            achievement_awards.name
+        )
+    )
+    if not exists:
+        return []
+
+    rows = await session.execute(
+        select(
+            Achievement.division,
+            achievement_awards.c.user_id,
+            achievement_awards.c.period_key,
+            func.sum(achievement_awards.c.reward),
+        )
+        .join(Achievement, Achievement.id == achievement_awards.c.achievement_id)
+        .group_by(
+            Achievement.division,
+            achievement_awards.c.user_id,
+            achievement_awards.c.period_key,
+        )
+    )
+    return [
+        (division, user_id, key, int(points)) for division, user_id, key, points in rows
+    ]
@@ -0,0 +1,177 @@
+from typing import Any, Literal
+
+from sqlalchemy import ColumnElement, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from stp_database.models.STP import Employee
+
+from backend.schemas.employee import CreateEmployeeDTO
+
+
+def employee_filters(
+    main_id: int | None = None,
+    user_id: int | None = None,
+    username: str | None = None,
+    fullname: str | None = None,
+    email: str | None = None,
+    head: str | None = None,
+    roles: list[int] | None = None,
+    division: str | None = None,
+) -> list[ColumnElement[bool]]:
+    """Build WHERE conditions matching repo.employee.get_users filters"""
+    conditions: list[ColumnElement[bool]] = []
+    if main_id is not None:
+        conditions.append(Employee.id == main_id)
+    if user_id is not None:
+        conditions.append(Employee.user_id == user_id)
+    if username is not None:
+        conditions.append(Employee.username == username)
+    if fullname is not None:
+        conditions.append(Employee.fullname == fullname)
+    if email is not None:
+        conditions.append(Employee.email == email)
+    if head is not None:
+        conditions.append(Employee.head == head)
+    if roles:
+        conditions.append(Employee.role.in_(roles))
+    if division is not None:
+        conditions.append(Employee.division == division)
+    return conditions
+
+
+async def count_employees(
+    session: AsyncSession, conditions: list[ColumnElement[bool]]
+) -> int:
+    stmt = select(func.count()).select_from(Employee).where(*conditions)
+    return await session.scalar(stmt) or 0
+
+
+async def get_employee_ids(
+    session: AsyncSession, conditions: list[ColumnElement[bool]]
+) -> list[int]:
+    stmt = select(Employee.id).where(*conditions)
+    return list((await session.scalars(stmt)).all())
+
+
+async def get_employee_ids_by_user_ids(
+    session: AsyncSession, user_ids: list[int], batch_size: int
+) -> dict[int, int]:
+    """Map Telegram ids to main ids, querying IN lists of at most batch_size"""
+    found: dict[int, int] = {}
+    for start in range(0, len(user_ids), batch_size):
+        chunk = user_ids[start : start + batch_size]
+        rows = await session.execute(
+            select(Employee.user_id, Employee.id).where(Employee.user_id.in_(chunk))
+        )
+        found.update(rows.tuples().all())
+    return found
+
+
+async def bulk_upsert_employees(
+    session: AsyncSession,
+    rows: list[CreateEmployeeDTO],
+    upsert: bool,
+    batch_size: int,
+) -> list[tuple[str, int | None]]:
+    """Insert rows, updating existing employees matched by user_id when upsert
+
+    Updates only touch fields present in the row. New rows are written with
+    one multi-row INSERT per chunk and their ids read back by user_id; rows
+    without a user_id cannot be found again and are inserted one by one.
+    Runs in the session's transaction without committing. Returns
+    (status, main id) for each row, status is created, updated or skipped
+    """
+    user_ids = [row.user_id for row in rows if row.user_id is not None]
+    existing = await get_employee_ids_by_user_ids(session, user_ids, batch_size)
+
+    results: list[tuple[str, int | None]] = [("skipped", None)] * len(rows)
+    to_insert: list[tuple[int, dict[str, Any]]] = []
+    to_insert_alone: list[tuple[int, dict[str, Any]]] = []
+    to_update: list[dict[str, Any]] = []
+    for index, row in enumerate(rows):
+        if row.user_id is None:
+            to_insert_alone.append((index, row.model_dump(exclude_none=True)))
+            continue
+        main_id = existing.get(row.user_id)
+        if main_id is None:
+            to_insert.append((index, row.model_dump(exclude_none=True)))
+        elif upsert:
+            to_update.append({"id": main_id, **row.model_dump(exclude_unset=True)})
+            results[index] = ("updated", main_id)
+        else:
+            results[index] = ("skipped", main_id)
+
+    for start in range(0, len(to_insert), batch_size):
+        chunk = to_insert[start : start + batch_size]
+        # Rows omitting a flag keep its default, so each column set is one INSERT
+        by_columns: dict[tuple[str, ...], list[dict[str, Any]]] = {}
+        for _, values in chunk:
+            by_columns.setdefault(tuple(sorted(values)), []).append(values)
+        for batch in by_columns.values():
+            await session.execute(insert(Employee).values(batch))
+
+        # No INSERT ... RETURNING on MySQL, new ids come from one SELECT
+        created = await get_employee_ids_by_user_ids(
+            session, [values["user_id"] for _, values in chunk], batch_size
+        )
+        for index, values in chunk:
+            results[index] = ("created", created[values["user_id"]])
+
+    for index, values in to_insert_alone:
+        result = await session.execute(insert(Employee).values(**values))
+        results[index] = ("created", result.inserted_primary_key[0])
+
+    for start in range(0, len(to_update), batch_size):
+        # ORM bulk UPDATE by primary key, executed as executemany
+        await session.execute(update(Employee), to_update[start : start + batch_size])
+
+    return results
+
+
+async def bulk_update_employees(
+    session: AsyncSession,
+    conditions: list[ColumnElement[bool]],
+    values: dict[str, Any],
+) -> list[tuple[int, int | None]]:
+    """Apply values to every employee matching conditions with one UPDATE
+
+    Matching rows are locked first so the returned (main id, Telegram id)
+    pairs are exactly the updated rows. Does not commit
+    """
+    rows = await session.execute(
+        select(Employee.id, Employee.user_id).where(*conditions).with_for_update()
+    )
+    affected = list(rows.tuples().all())
+    if not affected:
+        return []
+
+    await session.execute(
+        update(Employee)
+        .where(Employee.id.in_([main_id for main_id, _ in affected]))
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    return affected
+
+
+async def get_exchange_banned_user_ids(session: AsyncSession) -> list[int]:
+    stmt = select(Employee.user_id).where(
+        Employee.is_exchange_banned.is_(True), Employee.user_id.is_not(None)
+    )
+    return list((await session.scalars(stmt)).all())
+
+
+async def get_employees_by_ids(
+    session: AsyncSession,
+    ids: list[int],
+    batch_size: int,
+    key: Literal["user_id", "id"] = "user_id",
+) -> dict[int, Employee]:
+    """Resolve Telegram or main ids to employees with IN queries of at most batch_size"""
+    column = getattr(Employee, key)
+    unique_ids = list(dict.fromkeys(ids))
+    found: dict[int, Employee] = {}
+    for start in range(0, len(unique_ids), batch_size):
+        chunk = unique_ids[start : start + batch_size]
+        rows = await session.scalars(select(Employee).where(column.in_(chunk)))
+        found.update({getattr(employee, key): employee for employee in rows})
+    return found
@@ -0,0 +1,190 @@
+from datetime import datetime, timedelta
+from typing import Literal
+
+from sqlalchemy import (
+    ColumnElement,
+    and_,
+    case,
+    func,
+    literal_column,
+    null,
+    or_,
+    select,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+from stp_database.models.STP import Employee, Exchange
+
+from backend.core.pagination import encode_cursor
+
+ExchangeGroupBy = Literal["owner", "counterpart", "day", "week", "month"]
+ExchangeSplitBy = Literal["status", "payment_type"]
+
+
+def exchange_filters(
+    owner_id: int | None = None,
+    counterpart_id: int | None = None,
+    employee_id: int | None = None,
+    statuses: list[str] | None = None,
+    is_paid: bool | None = None,
+    start_time: datetime | None = None,
+    end_time: datetime | None = None,
+) -> list[ColumnElement[bool]]:
+    """Build WHERE conditions for exchange lists
+
+    The window bounds the shift start, so together with an equality filter
+    it is a range scan on composite indexes such as (owner_id, start_time)
+    or (status, start_time)
+    """
+    conditions: list[ColumnElement[bool]] = []
+    if owner_id is not None:
+        conditions.append(Exchange.owner_id == owner_id)
+    if counterpart_id is not None:
+        conditions.append(Exchange.counterpart_id == counterpart_id)
+    if employee_id is not None:
+        conditions.append(
+            or_(
+                Exchange.owner_id == employee_id, Exchange.counterpart_id == employee_id
+            )
+        )
+    if statuses:
+        conditions.append(Exchange.status.in_(statuses))
+    if is_paid is not None:
+        conditions.append(Exchange.is_paid == is_paid)
+    if start_time is not None:
+        conditions.append(Exchange.start_time >= start_time)
+    if end_time is not None:
+        conditions.append(Exchange.start_time < end_time)
+    return conditions
+
+
+async def get_exchanges_page(
+    session: AsyncSession,
+    conditions: list[ColumnElement[bool]],
+    limit: int,
+    after: tuple[datetime, int] | None = None,
+) -> tuple[list[Exchange], str | None]:
+    """Fetch one page ordered by (start_time, id), seeking past the after key"""
+    stmt = select(Exchange).where(*conditions)
+    if after is not None:
+        after_start, after_id = after
+        stmt = stmt.where(
+            or_(
+                Exchange.start_time > after_start,
+                and_(Exchange.start_time == after_start, Exchange.id > after_id),
+            )
+        )
+    stmt = stmt.order_by(Exchange.start_time, Exchange.id).limit(limit + 1)
+
+    rows = list((await session.scalars(stmt)).all())
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor({"start": last.start_time.isoformat(), "id": last.id})
+
+
+def _group_column(group_by: ExchangeGroupBy) -> ColumnElement:
+    match group_by:
+        case "owner":
+            return Exchange.owner_id
+        case "counterpart":
+            return Exchange.counterpart_id
+        case "day":
+            return func.date_format(Exchange.start_time, "%Y-%m-%d")
+        case "week":
+            # ISO year and week, e.g. 2025-W07
+            return func.date_format(Exchange.start_time, "%x-W%v")
+        case "month":
+            return func.date_format(Exchange.start_time, "%Y-%m")
+
+
+async def aggregate_exchanges(
+    session: AsyncSession,
+    conditions: list[ColumnElement[bool]],
+    group_by: ExchangeGroupBy,
+    split_by: ExchangeSplitBy | None = None,
+) -> list[tuple]:
+    """Count exchanges and sum prices per group in SQL
+
+    Returns (key, split, count, total_price, paid_count) rows
+    """
+    key = _group_column(group_by).label("group_key")
+    split = (
+        getattr(Exchange, split_by).label("split")
+        if split_by is not None
+        else null().label("split")
+    )
+    # Group by the alias so the bound DATE_FORMAT pattern is not repeated
+    columns = [literal_column("group_key")]
+    if split_by is not None:
+        columns.append(literal_column("split"))
+
+    stmt = (
+        select(
+            key,
+            split,
+            func.count().label("count"),
+            func.coalesce(func.sum(Exchange.price), 0).label("total_price"),
+            func.coalesce(
+                func.sum(case((Exchange.is_paid.is_(True), 1), else_=0)), 0
+            ).label("paid_count"),
+        )
+        .where(*conditions)
+        .group_by(*columns)
+        .order_by(*columns)
+    )
+    rows = await session.execute(stmt)
+    return list(rows.tuples().all())
+
+
+async def get_open_exchanges_between(
+    session: AsyncSession,
+    windows: list[tuple[datetime, datetime]],
+    statuses: list[str],
+    max_duration: timedelta,
+    division: str | None = None,
+    owner_intent: str | None = None,
+    include_private: bool = False,
+) -> list[Exchange]:
+    """Open exchanges overlapping any of the [start, end) windows
+
+    Shifts are never longer than max_duration, so each window narrows to a
+    bounded start_time range that an index on (status, start_time) can
+    serve. Overlapping ranges are merged and ORed, so exchanges in the gaps
+    between separate windows are never read
+    """
+    ranges: list[tuple[datetime, datetime]] = []
+    for start, end in sorted((start - max_duration, end) for start, end in windows):
+        if ranges and start <= ranges[-1][1]:
+            ranges[-1] = (ranges[-1][0], max(ranges[-1][1], end))
+        else:
+            ranges.append((start, end))
+
+    stmt = select(Exchange).where(
+        Exchange.status.in_(statuses),
+        or_(
+            *(
+                and_(Exchange.start_time >= start, Exchange.start_time < end)
+                for start, end in ranges
+            )
+        ),
+        Exchange.end_time > min(start for start, _ in windows),
+    )
+    if owner_intent is not None:
+        stmt = stmt.where(Exchange.owner_intent == owner_intent)
+    if not include_private:
+        stmt = stmt.where(Exchange.is_private.is_(False))
+    if division is not None:
+        stmt = stmt.join(Employee, Employee.user_id == Exchange.owner_id).where(
+            Employee.division == division
+        )
+
+    return list((await session.scalars(stmt)).all())
+
+
+async def get_open_exchanges(
+    session: AsyncSession, statuses: list[str]
+) -> list[Exchange]:
+    stmt = select(Exchange).where(Exchange.status.in_(statuses))
+    return list((await session.scalars(stmt)).all())
@@ -0,0 +1,22 @@
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+
+@asynccontextmanager
+async def named_lock(engine: AsyncEngine, name: str) -> AsyncIterator[bool]:
+    """Hold a MySQL GET_LOCK named lock shared by all workers
+
+    Yields False without waiting when another connection holds the lock. A
+    dedicated connection is kept for the whole block, since the lock belongs
+    to the connection and sessions hand theirs back to the pool on commit.
+    """
+    async with engine.connect() as conn:
+        acquired = await conn.scalar(select(func.get_lock(name, 0)))
+        try:
+            yield acquired == 1
+        finally:
+            if acquired == 1:
+                await conn.scalar(select(func.release_lock(name)))
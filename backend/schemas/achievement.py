@@ -1,5 +1,9 @@
+from typing import Literal
+
 from pydantic import BaseModel
 
+from backend.schemas.employee import EmployeeSummary
+
 
 class AchievementDTO(BaseModel):
     id: int
@@ -27,3 +31,69 @@ class PatchAchievementDTO(BaseModel):
     reward: int | None = None
     position: str | None = None
     period: str | None = None
+
+
+class AchievementsSync(BaseModel):
+    # True when the client must replace its copy instead of applying a delta
+    reset: bool
+    achievements: list[AchievementDTO]
+    deleted: list[int]
+    sync_token: str
+
+
+class AchievementEligibility(BaseModel):
+    employee: EmployeeSummary
+    achievements: list[AchievementDTO]
+
+
+class AchievementEligibilityBatchRequest(BaseModel):
+    ids: list[int]
+    key: Literal["user_id", "id"] = "user_id"
+    period: str | None = None
+
+
+class AchievementEligibilityBatch(BaseModel):
+    # Every achievement referenced below, listed once
+    achievements: dict[int, AchievementDTO]
+    # Achievement ids per requested employee id
+    eligible: dict[int, list[int]]
+    missing: list[int]
+
+
+class KPIEvaluationRequest(BaseModel):
+    division: str
+    period: str
+    user_ids: list[int]
+    # Metric name to values aligned with user_ids, null when unknown
+    metrics: dict[str, list[float | None]]
+
+
+class KPIAward(BaseModel):
+    user_id: int
+    achievement_id: int
+    reward: int
+
+
+class KPIEvaluation(BaseModel):
+    awards: list[KPIAward]
+    total_reward: int
+    # Reasons achievements could not be evaluated, by achievement id
+    skipped: dict[int, str]
+    missing: list[int]
+
+
+class LeaderboardEntry(BaseModel):
+    rank: int
+    user_id: int
+    points: int
+    employee: EmployeeSummary | None
+
+
+class PointsLeaderboard(BaseModel):
+    division: str
+    # "YYYY-MM" or "all"
+    period: str
+    participants: int
+    top: list[LeaderboardEntry]
+    # Requested user, None when they have no points in the period
+    user: LeaderboardEntry | None = None
@@ -4,6 +4,11 @@ from pydantic import BaseModel
 class TokenInfo(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: str | None = None
+
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
 
 
 class UserInfo(BaseModel):
@@ -1,4 +1,6 @@
-from pydantic import BaseModel
+from typing import Literal
+
+from pydantic import BaseModel, field_validator
 
 
 class EmployeeDTO(BaseModel):
@@ -19,8 +21,22 @@ class EmployeeDTO(BaseModel):
         from_attributes = True
 
 
+class EmployeeSummary(BaseModel):
+    id: int
+    user_id: int | None
+    fullname: str
+    username: str | None
+    division: str | None
+    position: str | None
+
+    class Config:
+        from_attributes = True
+
+
 class EmployeesList(BaseModel):
     employees: list[EmployeeDTO]
+    next_cursor: str | None = None
+    total: int | None = None
 
 
 class PatchEmployeeDTO(BaseModel):
@@ -35,3 +51,112 @@ class PatchEmployeeDTO(BaseModel):
     is_trainee: bool | None = None
     is_casino_allowed: bool | None = None
     is_exchange_banned: bool | None = None
+
+
+class CreateEmployeeDTO(BaseModel):
+    fullname: str
+    role: int = 0
+    user_id: int | None = None
+    username: str | None = None
+    division: str | None = None
+    position: str | None = None
+    head: str | None = None
+    email: str | None = None
+    is_trainee: bool | None = None
+    is_casino_allowed: bool | None = None
+    is_exchange_banned: bool | None = None
+
+    @field_validator("is_trainee", "is_casino_allowed", "is_exchange_banned")
+    @classmethod
+    def not_null(cls, value: bool | None) -> bool:
+        # Omitted flags keep the database default, explicit nulls are rejected
+        if value is None:
+            raise ValueError("не может быть null")
+        return value
+
+
+class BulkEmployeeResult(BaseModel):
+    index: int
+    status: Literal["created", "updated", "skipped", "error"]
+    id: int | None = None
+    user_id: int | None = None
+    detail: str | None = None
+
+
+class BulkEmployeesResult(BaseModel):
+    created: int
+    updated: int
+    skipped: int
+    results: list[BulkEmployeeResult]
+
+
+class EmployeeFilterDTO(BaseModel):
+    main_id: int | None = None
+    username: str | None = None
+    fullname: str | None = None
+    email: str | None = None
+    head: str | None = None
+    division: str | None = None
+    roles: list[int] | None = None
+
+
+class BulkPatchEmployeesDTO(BaseModel):
+    user_ids: list[int] | None = None
+    filters: EmployeeFilterDTO | None = None
+    patch: PatchEmployeeDTO
+
+
+class BulkPatchEmployeesResult(BaseModel):
+    updated: int
+    ids: list[int]
+    user_ids: list[int]
+
+
+class EmployeesBatchRequest(BaseModel):
+    ids: list[int]
+    key: Literal["user_id", "id"] = "user_id"
+
+
+class EmployeesBatch(BaseModel):
+    employees: dict[int, EmployeeDTO]
+    missing: list[int]
+
+
+class EmployeesSync(BaseModel):
+    # True when the client must replace its copy instead of applying a delta
+    reset: bool
+    employees: list[EmployeeDTO]
+    deleted: list[int]
+    sync_token: str
+
+
+class EmployeeSearchHit(BaseModel):
+    employee: EmployeeDTO
+    # 1.0 for prefix matches, share of query trigrams found for fuzzy ones
+    score: float
+
+
+class EmployeeSearch(BaseModel):
+    hits: list[EmployeeSearchHit]
+
+
+class OrgNode(BaseModel):
+    employee: EmployeeSummary
+    head_id: int | None
+    # Distance from the requested employee, negative for heads
+    depth: int
+    team_size: int
+
+
+class OrgSubtree(BaseModel):
+    root: OrgNode
+    subordinates: list[OrgNode]
+
+
+class OrgChain(BaseModel):
+    employee: OrgNode
+    chain: list[OrgNode]
+
+
+class OrgTeamSizes(BaseModel):
+    teams: list[OrgNode]
@@ -1,34 +1,43 @@
 from datetime import datetime
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, field_validator, model_validator
+
+from backend.schemas.employee import EmployeeSummary
 
 
 class ExchangeDTO(BaseModel):
     id: int
     owner_id: int
-    counterpart_id: int
+    counterpart_id: int | None
     start_time: datetime
     end_time: datetime
     price: int
     is_paid: bool
-    payment_type: str
-    payment_date: datetime
+    payment_type: str | None
+    payment_date: datetime | None
     owner_intent: str
     status: str
     is_private: bool
     in_owner_schedule: bool
     in_counterpart_schedule: bool
-    comment: str
+    comment: str | None
     created_at: datetime
-    updated_at: datetime
-    sold_at: datetime
+    updated_at: datetime | None
+    sold_at: datetime | None
 
     class Config:
         from_attributes = True
 
 
+class ExpandedExchangeDTO(ExchangeDTO):
+    # Filled only for the parties requested with expand
+    owner: EmployeeSummary | None = None
+    counterpart: EmployeeSummary | None = None
+
+
 class ExchangesList(BaseModel):
-    exchanges: list[ExchangeDTO]
+    exchanges: list[ExpandedExchangeDTO]
+    next_cursor: str | None = None
 
 
 class PatchExchangeDTO(BaseModel):
@@ -49,3 +58,65 @@ class PatchExchangeDTO(BaseModel):
     created_at: datetime | None = None
     updated_at: datetime | None = None
     sold_at: datetime | None = None
+
+
+class ExchangeStatsRow(BaseModel):
+    key: str | None
+    split: str | None = None
+    count: int
+    total_price: int
+    paid_count: int
+    unpaid_count: int
+
+
+class ExchangeStats(BaseModel):
+    group_by: str
+    split_by: str | None = None
+    rows: list[ExchangeStatsRow]
+
+
+class TimeWindow(BaseModel):
+    start_time: datetime
+    end_time: datetime
+
+    @field_validator("start_time", "end_time")
+    @classmethod
+    def to_local_naive(cls, value: datetime) -> datetime:
+        # Exchange times are stored as naive local time
+        if value.tzinfo is not None:
+            return value.astimezone().replace(tzinfo=None)
+        return value
+
+    @model_validator(mode="after")
+    def check_order(self):
+        if self.end_time <= self.start_time:
+            raise ValueError("end_time must be after start_time")
+        return self
+
+
+class ExchangeOverlapRequest(BaseModel):
+    windows: list[TimeWindow] = Field(min_length=1)
+    division: str | None = None
+    owner_intent: str | None = None
+    include_private: bool = False
+
+
+class WindowOverlaps(BaseModel):
+    start_time: datetime
+    end_time: datetime
+    exchange_ids: list[int]
+
+
+class ExchangeOverlaps(BaseModel):
+    windows: list[WindowOverlaps]
+    exchanges: dict[int, ExchangeDTO]
+
+
+class ExchangeMatch(BaseModel):
+    exchange: ExchangeDTO
+    score: float
+
+
+class ExchangeMatches(BaseModel):
+    exchange_id: int
+    matches: list[ExchangeMatch]
@@ -0,0 +1,33 @@
+from datetime import datetime
+
+from pydantic import BaseModel
+
+
+class CacheStats(BaseModel):
+    size: int
+    maxsize: int
+    hits: int
+    misses: int
+    hit_ratio: float
+
+
+class CachesStats(BaseModel):
+    caches: dict[str, CacheStats]
+
+
+class JobStats(BaseModel):
+    runs: int
+    failures: int
+    skipped: int
+    last_period_key: str | None
+    last_started_at: datetime | None
+    last_duration_seconds: float | None
+    last_awards: int
+    last_inserted: int
+    total_inserted: int
+    last_error: str | None
+
+
+class JobsStats(BaseModel):
+    running: bool
+    jobs: dict[str, JobStats]
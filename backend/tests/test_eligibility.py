@@ -0,0 +1,36 @@
+from backend.achievements.eligibility import EligibilityIndex
+from backend.schemas.achievement import AchievementDTO
+
+
+def achievement(achievement_id: int, period: str) -> AchievementDTO:
+    return AchievementDTO(
+        id=achievement_id,
+        name=f"a{achievement_id}",
+        description="",
+        division="НТП",
+        kpi="AHT <= 300",
+        reward=10,
+        position="Специалист",
+        period=period,
+    )
+
+
+def test_period_synonyms_match_across_languages() -> None:
+    index = EligibilityIndex(reload_interval=60)
+    index.load([achievement(1, "day"), achievement(2, "День"), achievement(3, "month")])
+
+    assert index.eligible("НТП", "Специалист", "день") == [1, 2]
+    assert index.eligible("НТП", "Специалист", "day") == [1, 2]
+    assert index.eligible("НТП", "Специалист", "месяц") == [3]
+    assert index.eligible("НТП", "Специалист") == [1, 2, 3]
+    assert [a.id for a in index.for_division("НТП", "день")] == [1, 2]
+
+
+def test_remove_drops_normalized_period() -> None:
+    index = EligibilityIndex(reload_interval=60)
+    index.load([achievement(1, "day"), achievement(2, "день")])
+
+    index.remove(1)
+    assert index.eligible("НТП", "Специалист", "day") == [2]
+    index.remove(2)
+    assert index.eligible("НТП", "Специалист") == []
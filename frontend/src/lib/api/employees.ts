@@ -17,8 +17,13 @@ export interface Employee {
 
 export interface EmployeesList {
 	employees: Employee[];
+	next_cursor?: string | null;
+	total?: number | null;
 }
 
+// Server-side maximum page size of GET /employees
+const EMPLOYEES_PAGE_SIZE = 1000;
+
 export interface EmployeeFilters {
 	main_id?: number;
 	user_id?: number;
@@ -45,25 +50,37 @@ export async function fetchEmployees(
 		filters.roles.forEach(role => params.append('roles', role.toString()));
 	}
 
-	const url = `${API_BASE_URL}/employees${params.toString() ? '?' + params.toString() : ''}`;
+	params.append('limit', EMPLOYEES_PAGE_SIZE.toString());
 
 	try {
-		const response = await fetch(url, {
-			method: 'GET',
-			headers: {
-				'Content-Type': 'application/json',
-				'Authorization': `Bearer ${token}`
-			}
-		});
+		// The list is paginated, follow next_cursor until the last page
+		const employees: Employee[] = [];
+		let cursor: string | null | undefined = null;
+		do {
+			const pageParams = new URLSearchParams(params);
+			if (cursor) pageParams.append('cursor', cursor);
 
-		if (!response.ok) {
-			if (response.status === 404) {
-				return { employees: [] };
+			const response = await fetch(`${API_BASE_URL}/employees?${pageParams.toString()}`, {
+				method: 'GET',
+				headers: {
+					'Content-Type': 'application/json',
+					'Authorization': `Bearer ${token}`
+				}
+			});
+
+			if (!response.ok) {
+				if (response.status === 404) {
+					return { employees: [] };
+				}
+				throw new Error(`HTTP ${response.status}: ${response.statusText}`);
 			}
-			throw new Error(`HTTP ${response.status}: ${response.statusText}`);
-		}
 
-		return await response.json();
+			const page: EmployeesList = await response.json();
+			employees.push(...page.employees);
+			cursor = page.next_cursor;
+		} while (cursor);
+
+		return { employees };
 	} catch (error) {
 		console.error('Error fetching employees:', error);
 		throw error;